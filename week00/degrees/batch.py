@@ -0,0 +1,277 @@
+"""
+Batch mode for degrees.
+
+Reads a CSV file of (name, name) pairs and writes one JSON object per pair,
+in input order. Single-source breadth-first search trees are kept in a
+bounded LRU cache: a pair whose source (or target) already has a tree is
+answered by walking that tree, and a source that appears again later in
+the batch gets a tree built for it instead of a one-off search.
+
+With --processes N the pairs are grouped by source and spread over a
+pool of worker processes, each with its own tree cache. Workers are forked
+after the data is loaded, so they share it copy-on-write; where fork is not
+available each worker loads the data itself, which for --compact means
+mapping the same snapshot file, so the pages are still shared. Results are
+written in input order either way.
+
+Usage: python batch.py pairs [directory] [--compact] [--output RESULTS]
+                       [--cache N] [--processes N]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+from collections import Counter, OrderedDict
+
+import degrees
+
+# Default number of search trees kept in memory
+CACHE_SIZE = 16
+
+
+class TreeCache():
+    """
+    Least recently used cache of `degrees.bfs_tree` results by source;
+    `server.py` also keeps its answers in one, by pair.
+    """
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, person_id):
+        return person_id in self.trees
+
+    def get(self, person_id):
+        tree = self.trees.get(person_id)
+        if tree is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.trees.move_to_end(person_id)
+        return tree
+
+    def add(self, person_id, tree):
+        if self.size <= 0:
+            return
+        self.trees[person_id] = tree
+        self.trees.move_to_end(person_id)
+        while len(self.trees) > self.size:
+            self.trees.popitem(last=False)
+
+
+def read_pairs(filename):
+    """
+    Returns the (name, name) pairs of a CSV file, skipping blank lines.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        return [(row[0].strip(), row[1].strip())
+                for row in csv.reader(f) if row]
+
+
+def resolve(name):
+    """
+    Returns (person_id, error) for a name; batch mode cannot ask
+    which person was meant, so ambiguous names are an error.
+    """
+    person_ids = degrees.person_ids_for_name(name)
+    if len(person_ids) == 0:
+        return None, f"person not found: {name}"
+    if len(person_ids) > 1:
+        return None, f"ambiguous name: {name} ({', '.join(sorted(person_ids))})"
+    return person_ids[0], None
+
+
+def find_path(source, target, cache, upcoming):
+    """
+    Returns the shortest path from source to target, reusing a cached
+    search tree rooted at either end when there is one. `upcoming` counts
+    how many later pairs still start at each source.
+    """
+    if source in cache:
+        return degrees.tree_path(cache.get(source), target)
+    if target in cache:
+        path = degrees.tree_path(cache.get(target), source)
+        return None if path is None else degrees.reverse_path(target, path)
+
+    cache.misses += 1
+    if upcoming[source] > 0:
+        tree = degrees.bfs_tree(source)
+        cache.add(source, tree)
+        return degrees.tree_path(tree, target)
+    return degrees.shortest_path(source, target)
+
+
+def describe(path):
+    return [{"movie_id": movie_id,
+             "movie": degrees.movie_title(movie_id),
+             "person_id": person_id,
+             "person": degrees.person_name(person_id)}
+            for movie_id, person_id in path]
+
+
+def answer(source_name, target_name, source, target, cache, upcoming):
+    """
+    Returns the JSON-ready result for one resolved pair.
+    """
+    upcoming[source] -= 1
+    path = find_path(source, target, cache, upcoming)
+    return {"source": source_name, "target": target_name,
+            "degrees": None if path is None else len(path),
+            "path": None if path is None else describe(path)}
+
+
+def fork_context():
+    """
+    Returns the fork multiprocessing context where there is one, so
+    workers inherit the loaded data, and the default context otherwise.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("fork" if "fork" in methods else None)
+
+
+# Tree cache of a worker process, created by `init_worker`
+worker_cache = None
+
+
+def init_worker(directory, compact, cache_size):
+    """
+    Prepares a pool worker: loads the data unless it was inherited
+    from the parent through fork.
+    """
+    global worker_cache
+    if not degrees.people and degrees.graph is None:
+        degrees.load_data(directory, compact)
+    worker_cache = TreeCache(cache_size)
+
+
+def answer_group(group):
+    """
+    Answers, in a worker process, a list of (position, source name,
+    target name, source, target) pairs that all share one source.
+    Returns the (position, result) pairs, the tree cache hit and miss
+    counts and the number of states explored.
+    """
+    hits, misses = worker_cache.hits, worker_cache.misses
+    explored = degrees.num_explored
+    upcoming = Counter({group[0][3]: len(group)})
+    results = [(position, answer(*pair, worker_cache, upcoming))
+               for position, *pair in group]
+    return (results, worker_cache.hits - hits, worker_cache.misses - misses,
+            degrees.num_explored - explored)
+
+
+def answer_parallel(pairs, processes, directory, compact, cache_size, stats):
+    """
+    Yields (position, result) for every resolved pair, spreading the work
+    over a pool of `processes` worker processes. Tree cache hits and misses
+    of the workers are added to `stats`, and the states they explored to
+    `degrees.num_explored`.
+    """
+    groups = {}
+    for position, pair in enumerate(pairs):
+        groups.setdefault(pair[2], []).append((position, *pair))
+
+    with fork_context().Pool(processes, initializer=init_worker,
+                             initargs=(directory, compact,
+                                       cache_size)) as pool:
+        chunksize = max(1, len(groups) // (processes * 8))
+        for results, hits, misses, explored in pool.imap_unordered(
+                answer_group, groups.values(), chunksize):
+            stats.hits += hits
+            stats.misses += misses
+            degrees.num_explored += explored
+            yield from results
+
+
+def run(pairs_filename, output_filename=None, cache_size=CACHE_SIZE,
+        processes=1, directory=None, compact=False):
+    """
+    Answers every pair in `pairs_filename` and writes JSON lines to
+    `output_filename`, or to standard output. With processes > 1 the
+    searches run in a pool of worker processes, which load `directory`
+    themselves if they cannot inherit the loaded data.
+    Returns a `TreeCache` whose hits and misses cover the whole batch.
+    """
+    results = []
+    pairs = []
+    for source_name, target_name in read_pairs(pairs_filename):
+        source, source_error = resolve(source_name)
+        target, target_error = resolve(target_name)
+        error = source_error or target_error
+        if error is not None:
+            results.append({"source": source_name, "target": target_name,
+                            "error": error})
+        else:
+            results.append(None)
+            pairs.append((source_name, target_name, source, target))
+
+    # Positions in `results` of the resolved pairs, in order
+    pending = [position for position, result in enumerate(results)
+               if result is None]
+
+    if processes > 1:
+        cache = TreeCache(0)
+        answers = answer_parallel(pairs, processes, directory, compact,
+                                  cache_size, cache)
+    else:
+        cache = TreeCache(cache_size)
+        upcoming = Counter(pair[2] for pair in pairs)
+        answers = ((position, answer(*pair, cache, upcoming))
+                   for position, pair in enumerate(pairs))
+
+    output = open(output_filename, "w", encoding="utf-8") \
+        if output_filename else sys.stdout
+    written = 0
+
+    def flush():
+        """
+        Writes every result that is ready, keeping input order.
+        """
+        nonlocal written
+        while written < len(results) and results[written] is not None:
+            output.write(json.dumps(results[written]) + "\n")
+            results[written] = True
+            written += 1
+
+    try:
+        flush()
+        for position, result in answers:
+            results[pending[position]] = result
+            flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return cache
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a CSV file of name pairs as JSON lines.")
+    parser.add_argument("pairs")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data into the compact graph")
+    parser.add_argument("--output", metavar="RESULTS",
+                        help="JSON lines file (default: standard output)")
+    parser.add_argument("--cache", metavar="N", type=int, default=CACHE_SIZE,
+                        help="number of search trees to keep per process")
+    parser.add_argument("--processes", metavar="N", type=int, default=1,
+                        help="number of worker processes")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, args.compact)
+    print("Data loaded.", file=sys.stderr)
+
+    cache = run(args.pairs, args.output, args.cache, args.processes,
+                args.directory, args.compact)
+    print(f"Tree hits: {cache.hits}, searches: {cache.misses}, "
+          f"states explored: {degrees.num_explored}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Micro-benchmarks for the degrees search.
+
+Usage: python benchmark.py frontier|memory|expansion|processes [directory]
+                           [--pairs N] [--seed S] [--processes N]
+"""
+
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import batch
+import degrees
+from graph import load_graph
+from snapshot import open_graph
+from util import StackFrontier, QueueFrontier
+
+
+class ListStackFrontier():
+    """
+    The original list-backed frontier, kept as a baseline.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier[-1]
+        self.frontier = self.frontier[:-1]
+        return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def neighbor_set_search(source, target):
+    """
+    `degrees.bidirectional_search` as it was before movies were marked
+    expanded: every expanded person materializes their neighbor set.
+    """
+    if source == target:
+        return []
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, reached, other = forward_frontier, forward, backward
+        else:
+            frontier, reached, other = backward_frontier, backward, forward
+        next_frontier = []
+        for person_id in frontier:
+            degrees.num_explored += 1
+            for movie_id, neighbor in degrees.neighbors_for_person(person_id):
+                if neighbor in reached:
+                    continue
+                reached[neighbor] = (movie_id, person_id)
+                if neighbor in other:
+                    return degrees.join_paths(forward, backward, neighbor)
+                next_frontier.append(neighbor)
+        if reached is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    return None
+
+
+def random_pairs(count, seed):
+    """
+    Returns `count` reproducible (source, target) person_id pairs.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [(rng.choice(person_ids), rng.choice(person_ids))
+            for _ in range(count)]
+
+
+def time_search(pairs, **kwargs):
+    """
+    Runs `shortest_path` on every pair and returns
+    (seconds, states explored, path lengths).
+    """
+    degrees.num_explored = 0
+    lengths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        path = degrees.shortest_path(source, target, **kwargs)
+        lengths.append(None if path is None else len(path))
+    return time.perf_counter() - start, degrees.num_explored, lengths
+
+
+def bench_frontier(args):
+    """
+    Compares the list-backed frontiers with the deque-backed ones
+    on plain (single-source) breadth-first search.
+    """
+    load(args.directory)
+    pairs = random_pairs(args.pairs, args.seed)
+    results = {}
+    for label, frontier in [("list", ListQueueFrontier),
+                            ("deque", QueueFrontier)]:
+        degrees.QueueFrontier = frontier
+        seconds, explored, lengths = time_search(pairs, bidirectional=False)
+        results[label] = lengths
+        print(f"{label:>6}: {seconds:8.3f} s, {explored} states explored")
+    degrees.QueueFrontier = QueueFrontier
+
+    if results["list"] != results["deque"]:
+        raise Exception("frontiers disagree on path lengths")
+
+    # Stack frontiers only need to agree on push/pop order
+    old, new = ListStackFrontier(), StackFrontier()
+    for node in range(10000):
+        old.add(degrees.Node(node, None, None))
+        new.add(degrees.Node(node, None, None))
+    start = time.perf_counter()
+    while not old.empty():
+        old.contains_state(old.remove().state)
+    middle = time.perf_counter()
+    while not new.empty():
+        new.contains_state(new.remove().state)
+    end = time.perf_counter()
+    print(f" stack: list {middle - start:.3f} s, deque {end - middle:.3f} s"
+          " (10000 nodes)")
+
+
+def bench_expansion(args):
+    """
+    Compares per-person neighbor sets with movie-level expansion in the
+    bidirectional search: time, states explored and peak allocation.
+    """
+    load(args.directory)
+    pairs = random_pairs(args.pairs, args.seed)
+    results = {}
+    search = degrees.bidirectional_search
+    for label, function in [("neighbor sets", neighbor_set_search),
+                            ("movies", search)]:
+        degrees.bidirectional_search = function
+        tracemalloc.start()
+        seconds, explored, lengths = time_search(pairs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = lengths
+        print(f"{label:>14}: {seconds:8.3f} s, {explored} states explored, "
+              f"{peak / 2 ** 20:.1f} MiB peak allocation")
+    degrees.bidirectional_search = search
+
+    if results["neighbor sets"] != results["movies"]:
+        raise Exception("searches disagree on path lengths")
+
+
+def bench_memory(args):
+    """
+    Reports memory held by the dict-of-sets representation, by the
+    compact CSR graph loaded from the CSV files and by the same graph
+    opened from its snapshot, after loading the same directory.
+    """
+    loaders = [("dicts", lambda: degrees.load_data(args.directory)),
+               ("compact", lambda: load_graph(args.directory)),
+               ("snapshot", lambda: open_graph(args.directory))]
+    for label, loader in loaders:
+        tracemalloc.start()
+        start = time.perf_counter()
+        graph = loader()
+        seconds = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:>8}: {current / 2 ** 20:8.1f} MiB held, "
+              f"{peak / 2 ** 20:8.1f} MiB peak, loaded in {seconds:.1f} s")
+
+        degrees.names.clear()
+        degrees.people.clear()
+        degrees.movies.clear()
+        del graph
+
+
+def bench_processes(args):
+    """
+    Runs the same batch of pairs through `batch.run` with 1, 2, 4, ...
+    worker processes, up to --processes, and reports the time and the
+    speedup over one process for each.
+    """
+    load(args.directory)
+    pairs = random_pairs(args.pairs, args.seed)
+    print(f"{os.cpu_count()} CPUs, {len(pairs)} pairs")
+
+    counts = [1]
+    while counts[-1] * 2 <= args.processes:
+        counts.append(counts[-1] * 2)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        pairs_filename = os.path.join(scratch, "pairs.csv")
+        with open(pairs_filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            for source, target in pairs:
+                writer.writerow([degrees.person_name(source),
+                                 degrees.person_name(target)])
+
+        baseline = expected = None
+        for processes in counts:
+            output_filename = os.path.join(scratch, f"{processes}.jsonl")
+            start = time.perf_counter()
+            batch.run(pairs_filename, output_filename,
+                      processes=processes, directory=args.directory)
+            seconds = time.perf_counter() - start
+            with open(output_filename, encoding="utf-8") as f:
+                output = f.read()
+
+            if baseline is None:
+                baseline, expected = seconds, output
+            elif output != expected:
+                raise Exception(f"{processes} processes disagree on results")
+            print(f"{processes:>4} processes: {seconds:8.3f} s, "
+                  f"{baseline / seconds:5.2f}x")
+
+
+def load(directory):
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("benchmark",
+                        choices=["frontier", "memory", "expansion",
+                                 "processes"])
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--pairs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int,
+                        default=max(4, os.cpu_count() or 1),
+                        help="largest number of worker processes to try")
+    args = parser.parse_args()
+
+    if args.benchmark == "frontier":
+        bench_frontier(args)
+    elif args.benchmark == "memory":
+        bench_memory(args)
+    elif args.benchmark == "expansion":
+        bench_expansion(args)
+    elif args.benchmark == "processes":
+        bench_processes(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@ import csv
 import sys
 import time
 
+import landmarks
+from graph import join_paths
+from snapshot import open_graph
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -13,12 +16,30 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of the dicts above when loaded
+graph = None
+
+# Landmark distance index over `graph`, if loaded
+index = None
+
 num_explored = 0
 
-def load_data(directory):
+def load_data(directory, compact=False, num_landmarks=0):
     """
     Load data from CSV files into memory.
+
+    With compact=True the data is loaded into `graph` instead, from the
+    directory's binary snapshot when it is up to date, and `names`,
+    `people` and `movies` stay empty. A positive `num_landmarks` also
+    loads (or builds) a landmark `index` over it.
     """
+    global graph, index
+    if compact or num_landmarks:
+        graph = open_graph(directory)
+        if num_landmarks:
+            index = landmarks.open_index(graph, directory, num_landmarks)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -56,13 +77,22 @@ def load_data(directory):
 
 def main():
     
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    compact = "--compact" in args
+    if compact:
+        args.remove("--compact")
+    num_landmarks = 0
+    if "--landmarks" in args:
+        num_landmarks = landmarks.LANDMARKS
+        args.remove("--landmarks")
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [directory] [--compact] "
+                 "[--landmarks]")
+    directory = args[0] if len(args) == 1 else "large"
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact, num_landmarks)
     print("Data loaded.")
 
     while True:
@@ -78,6 +108,14 @@ def main():
             continue
 
         start_time = time.time()
+        if index is not None:
+            lower, upper = degree_bounds(source, target)
+            if lower is None:
+                print("Estimate: not connected.")
+            elif upper is None:
+                print(f"Estimate: at least {lower} degrees.")
+            else:
+                print(f"Estimate: {lower} to {upper} degrees.")
         path = shortest_path(source, target)
 
         if path is None:
@@ -87,23 +125,44 @@ def main():
             print(f"{degrees} degrees of separation.")
             path = [(None, source)] + path
             for i in range(degrees):
-                person1 = people[path[i][1]]["name"]
-                person2 = people[path[i + 1][1]]["name"]
-                movie = movies[path[i + 1][0]]["title"]
+                person1 = person_name(path[i][1])
+                person2 = person_name(path[i + 1][1])
+                movie = movie_title(path[i + 1][0])
                 print(f"{i + 1}: {person1} and {person2} starred in {movie}")
             print("\nNumber of states explored:", num_explored)
             print(f"Run time: {(time.time() - start_time):.2f} seconds\n")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    By default the search runs from both ends at once (see
+    `bidirectional_search`); pass bidirectional=False for a plain
+    breadth-first search from the source. Searches over the compact
+    `graph` are always bidirectional, and pruned with the landmark
+    `index` when one is loaded.
     """
     global num_explored
-    
+
+    if graph is not None:
+        source, target = graph.person_index(source), graph.person_index(target)
+        if source is None or target is None:
+            return None
+        explored = graph.num_explored
+        if index is not None:
+            path = landmarks.pruned_path(graph, index, source, target)
+        else:
+            path = graph.shortest_path(source, target)
+        num_explored += graph.num_explored - explored
+        return None if path is None else graph.path_ids(path)
+
+    if bidirectional:
+        return bidirectional_search(source, target)
+
     # Initialize starting node and frontier
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
@@ -139,20 +198,170 @@ def shortest_path(source, target):
                     connections.reverse()
                     return connections    
 
+
+def bidirectional_search(source, target):
+    """
+    Breadth-first search from the source and the target at the same time.
+
+    Each side keeps a map of reached people to the (movie_id, person_id)
+    step that reached them. On every iteration the side with the smaller
+    frontier expands one full level; as soon as it reaches a person already
+    reached by the other side, the two half-paths are joined at that person.
+    Returns the same list of (movie_id, person_id) pairs as `shortest_path`.
+
+    The search steps person -> movie -> person: once a side has gone
+    through a movie, its whole cast is reached, so the movie is marked
+    expanded and skipped when another person in that cast is expanded.
+    """
+    global num_explored
+
+    if source == target:
+        return []
+
+    # Maps person_id to the (movie_id, person_id) step it was reached from
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # Movies each side has already gone through
+    forward_movies = set()
+    backward_movies = set()
+
+    while forward_frontier and backward_frontier:
+
+        # Expand the cheaper side
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, reached, other = forward_frontier, forward, backward
+            expanded = forward_movies
+        else:
+            frontier, reached, other = backward_frontier, backward, forward
+            expanded = backward_movies
+
+        next_frontier = []
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id in people[person_id]["movies"]:
+                if movie_id in expanded:
+                    continue
+                expanded.add(movie_id)
+                for neighbor in movies[movie_id]["stars"]:
+                    if neighbor in reached:
+                        continue
+                    reached[neighbor] = (movie_id, person_id)
+                    if neighbor in other:
+                        return join_paths(forward, backward, neighbor)
+                    next_frontier.append(neighbor)
+
+        if reached is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between two
+    people from the landmark index, without searching. See
+    `landmarks.LandmarkIndex.bounds`.
+    """
+    return index.bounds(graph.person_index(source), graph.person_index(target))
+
+
+def bfs_tree(source):
+    """
+    Runs a breadth-first search from the source over every connected
+    person and returns the search tree, to be read with `tree_path`.
+    """
+    global num_explored
+
+    if graph is not None:
+        explored = graph.num_explored
+        tree = graph.bfs_tree(graph.person_index(source))
+        num_explored += graph.num_explored - explored
+        return tree
+
+    # Maps person_id to the (movie_id, person_id) step it was reached from
+    tree = {source: None}
+    expanded = set()
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person_id in frontier:
+            num_explored += 1
+            for movie_id in people[person_id]["movies"]:
+                if movie_id in expanded:
+                    continue
+                expanded.add(movie_id)
+                for neighbor in movies[movie_id]["stars"]:
+                    if neighbor not in tree:
+                        tree[neighbor] = (movie_id, person_id)
+                        next_frontier.append(neighbor)
+        frontier = next_frontier
+    return tree
+
+
+def tree_path(tree, target):
+    """
+    Returns the list of (movie_id, person_id) pairs that connect the root
+    of a `bfs_tree` to the target, or None if the target was not reached.
+    """
+    if graph is not None:
+        path = graph.tree_path(tree, graph.person_index(target))
+        return None if path is None else graph.path_ids(path)
+
+    if target not in tree:
+        return None
+    path = []
+    while tree[target] is not None:
+        movie_id, parent = tree[target]
+        path.append((movie_id, target))
+        target = parent
+    path.reverse()
+    return path
+
+
+def reverse_path(source, path):
+    """
+    Reverses a path that starts at the source, returning the path
+    from its last person back to the source.
+    """
+    people_ids = [source] + [person_id for _, person_id in path]
+    movie_ids = [movie_id for movie_id, _ in path]
+    return list(zip(reversed(movie_ids), reversed(people_ids[:-1])))
+
+
+def person_ids_for_name(name):
+    """
+    Returns the IMDB ids of every person with the given name.
+    """
+    if graph is not None:
+        return [graph.person_ids[person]
+                for person in graph.person_indices_for_name(name)]
+    return list(names.get(name.lower(), set()))
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
+        if graph is not None:
+            matches = graph.person_indices_for_prefix(name, limit=5)
+            if matches:
+                suggestions = ", ".join(graph.person_names[person]
+                                        for person in matches)
+                print(f"Did you mean: {suggestions}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -165,11 +374,33 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_name(person_id):
+    if graph is not None:
+        return graph.person_names[graph.person_index(person_id)]
+    return people[person_id]["name"]
+
+
+def person_birth(person_id):
+    if graph is not None:
+        return graph.person_births[graph.person_index(person_id)]
+    return people[person_id]["birth"]
+
+
+def movie_title(movie_id):
+    if graph is not None:
+        return graph.movie_titles[graph.movie_index(movie_id)]
+    return movies[movie_id]["title"]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(
+                    graph.person_index(person_id))}
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
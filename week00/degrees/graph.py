@@ -0,0 +1,469 @@
+"""
+Compact integer-indexed representation of the degrees dataset.
+
+People and movies are interned to dense integer indices and the
+person-movie bipartite graph is stored as two compressed sparse row
+(CSR) adjacency lists: for person `p`, the movies they starred in are
+`person_movies[person_offsets[p]:person_offsets[p + 1]]`, and likewise
+`movie_stars[movie_offsets[m]:movie_offsets[m + 1]]` holds the cast of
+movie `m`. All of them are flat `array` objects, so the whole graph costs
+a few bytes per star instead of a Python set entry. Names, titles and ids
+are kept the same way, as `StringTable`s.
+"""
+
+import csv
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from operator import itemgetter
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Typecode for every index and offset array
+INDEX = "i"
+
+# Typecode of string table offsets
+OFFSET = "q"
+
+# Rows read between progress reports
+CHUNK_ROWS = 100000
+
+
+class StringTable():
+    """
+    Sequence of strings stored as one UTF-8 blob
+    plus an array of offsets into it.
+    """
+    def __init__(self, offsets=None, blob=None):
+        self.offsets = array(OFFSET, [0]) if offsets is None else offsets
+        self.blob = bytearray() if blob is None else blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def append(self, string):
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+
+class Graph():
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 id_order, name_order, movie_order):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # Person indices sorted by IMDB id and by lowercased name,
+        # movie indices sorted by IMDB id
+        self.id_order = id_order
+        self.name_order = name_order
+        self.movie_order = movie_order
+
+        self.num_explored = 0
+
+    def num_people(self):
+        return len(self.person_offsets) - 1
+
+    def num_movies(self):
+        return len(self.movie_offsets) - 1
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with IMDB id `person_id`, or None.
+        """
+        return find(self.id_order, self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with IMDB id `movie_id`, or None.
+        """
+        return find(self.movie_order, self.movie_ids, movie_id)
+
+    def person_indices_for_name(self, name):
+        """
+        Returns the indices of every person called `name`, ignoring case.
+        """
+        name = name.lower()
+        key = lambda p: self.person_names[p].lower()
+        i = bisect_left(self.name_order, name, key=key)
+        indices = []
+        while i < len(self.name_order) and key(self.name_order[i]) == name:
+            indices.append(self.name_order[i])
+            i += 1
+        return indices
+
+    def person_indices_for_prefix(self, prefix, limit=None):
+        """
+        Returns the indices of people whose name starts with `prefix`,
+        ignoring case, in name order and at most `limit` of them.
+        """
+        prefix = prefix.lower()
+        key = lambda p: self.person_names[p].lower()
+        i = bisect_left(self.name_order, prefix, key=key)
+        indices = []
+        while i < len(self.name_order) and (limit is None or
+                                            len(indices) < limit):
+            if not key(self.name_order[i]).startswith(prefix):
+                break
+            indices.append(self.name_order[i])
+            i += 1
+        return indices
+
+    def movies_for(self, person):
+        return self.person_movies[
+            self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_for(self, movie):
+        return self.movie_stars[
+            self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Returns (movie, person) index pairs for people
+        who starred with a given person.
+        """
+        neighbors = set()
+        for movie in self.movies_for(person):
+            for star in self.stars_for(movie):
+                neighbors.add((movie, star))
+        return neighbors
+
+    def shortest_path(self, source, target, prune=None):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect the source to the target, or None if there is no path.
+
+        Same bidirectional breadth-first search as
+        `degrees.bidirectional_search`, including skipping movies a side
+        has already gone through, but over integer indices and reading the
+        adjacency arrays directly.
+
+        If given, `prune(person, depth, forward)` is called for every
+        newly reached person that does not meet the other side; when it
+        returns True the person is not expanded further. `depth` is the
+        number of steps from that side's end, and `forward` is True on the
+        side searching from the source.
+        """
+        if source == target:
+            return []
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        # Maps person to the (movie, person) step it was reached from
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+        forward_movies = set()
+        backward_movies = set()
+        forward_depth = backward_depth = 0
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_depth += 1
+                frontier, reached, other = forward_frontier, forward, backward
+                expanded, depth = forward_movies, forward_depth
+            else:
+                backward_depth += 1
+                frontier, reached, other = backward_frontier, backward, forward
+                expanded, depth = backward_movies, backward_depth
+
+            next_frontier = []
+            for person in frontier:
+                self.num_explored += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if movie in expanded:
+                        continue
+                    expanded.add(movie)
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if star in reached:
+                            continue
+                        reached[star] = (movie, person)
+                        if star in other:
+                            return join_paths(forward, backward, star)
+                        if prune is not None and prune(star, depth,
+                                                       reached is forward):
+                            continue
+                        next_frontier.append(star)
+
+            if reached is forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+
+        return None
+
+    def bfs_tree(self, source):
+        """
+        Runs a breadth-first search from the source over the whole graph.
+
+        Returns a (parents, via) pair of arrays: for every person reached,
+        the person and the movie they were reached through; -1 for people
+        who are not connected to the source.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        parents = array(INDEX, [-1]) * self.num_people()
+        via = array(INDEX, [-1]) * self.num_people()
+        expanded = bytearray(self.num_movies())
+        parents[source] = source
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for person in frontier:
+                self.num_explored += 1
+                for i in range(person_offsets[person],
+                               person_offsets[person + 1]):
+                    movie = person_movies[i]
+                    if expanded[movie]:
+                        continue
+                    expanded[movie] = 1
+                    for j in range(movie_offsets[movie],
+                                   movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if parents[star] == -1:
+                            parents[star] = person
+                            via[star] = movie
+                            next_frontier.append(star)
+            frontier = next_frontier
+        return parents, via
+
+    def tree_path(self, tree, target):
+        """
+        Returns the path of (movie, person) index pairs from the root of a
+        `bfs_tree` to the target, or None if the target was not reached.
+        """
+        parents, via = tree
+        if parents[target] == -1:
+            return None
+        path = []
+        while parents[target] != target:
+            path.append((via[target], target))
+            target = parents[target]
+        path.reverse()
+        return path
+
+    def path_ids(self, path):
+        """
+        Converts a path of index pairs to (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+def find(order, values, value):
+    """
+    Binary-searches `order`, a permutation sorting `values`,
+    for the index of `value`.
+    """
+    i = bisect_left(order, value, key=values.__getitem__)
+    if i < len(order) and values[order[i]] == value:
+        return order[i]
+    return None
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Builds the source-to-target path through `meeting` from the
+    parent maps of a bidirectional search.
+    """
+    path = []
+    person = meeting
+    while forward[person] is not None:
+        movie, parent = forward[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+
+    # Steps towards the target are stored in reverse direction
+    person = meeting
+    while backward[person] is not None:
+        movie, parent = backward[person]
+        path.append((movie, parent))
+        person = parent
+    return path
+
+
+def zeros(length):
+    return array(INDEX, bytes(array(INDEX).itemsize * length))
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in MiB,
+    or None where the `resource` module is not available.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def report_progress(filename, rows):
+    """
+    Prints how far a CSV file has been read, and the peak RSS so far.
+    """
+    peak = peak_rss()
+    rss = "" if peak is None else f", peak RSS {peak:.0f} MiB"
+    print(f"{os.path.basename(filename)}: {rows:,} rows{rss}",
+          file=sys.stderr)
+
+
+def read_columns(filename, columns, progress=None):
+    """
+    Yields the rows of a CSV file in chunks of at most `CHUNK_ROWS`,
+    each row a tuple of the named columns. Columns are looked up in the
+    header once and then read by position; `progress` is called with the
+    filename and the number of rows read after every chunk.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        getter = itemgetter(*[header.index(column) for column in columns])
+        rows = 0
+        while True:
+            chunk = [getter(row) for row in islice(reader, CHUNK_ROWS) if row]
+            if not chunk:
+                break
+            rows += len(chunk)
+            yield chunk
+            if progress is not None:
+                progress(filename, rows)
+
+
+def read_stars(directory, person_lookup, movie_lookup, progress=None):
+    """
+    Yields (person, movie) index pairs from stars.csv,
+    skipping rows that refer to unknown people or movies.
+    """
+    for chunk in read_columns(f"{directory}/stars.csv",
+                              ["person_id", "movie_id"], progress):
+        for person_id, movie_id in chunk:
+            person = person_lookup.get(person_id)
+            movie = movie_lookup.get(movie_id)
+            if person is not None and movie is not None:
+                yield person, movie
+
+
+def transpose(offsets, values, num_columns):
+    """
+    Returns the CSR arrays of the transposed adjacency. Rows come out
+    sorted and unique if every row of the input has unique values.
+    """
+    counts = zeros(num_columns + 1)
+    for column in values:
+        counts[column + 1] += 1
+    for i in range(num_columns):
+        counts[i + 1] += counts[i]
+
+    transposed = zeros(len(values))
+    cursor = counts[:-1]
+    for row in range(len(offsets) - 1):
+        for i in range(offsets[row], offsets[row + 1]):
+            column = values[i]
+            transposed[cursor[column]] = row
+            cursor[column] += 1
+    return counts, transposed
+
+
+def load_graph(directory, progress=None):
+    """
+    Load data from CSV files into a compact `Graph`.
+
+    The files are streamed in chunks and nothing but the graph itself is
+    kept: names and other strings go straight into `StringTable`s, and
+    stars.csv is read twice, once to count every person's movies and once
+    to fill the CSR arrays in place, so its rows are never held in memory.
+    `progress` is passed on to `read_columns`.
+    """
+    person_ids = StringTable()
+    person_names = StringTable()
+    person_births = StringTable()
+    person_lookup = {}
+    for chunk in read_columns(f"{directory}/people.csv",
+                              ["id", "name", "birth"], progress):
+        for person_id, name, birth in chunk:
+            person_lookup[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            person_names.append(name)
+            person_births.append(birth)
+
+    movie_ids = StringTable()
+    movie_titles = StringTable()
+    movie_years = StringTable()
+    movie_lookup = {}
+    for chunk in read_columns(f"{directory}/movies.csv",
+                              ["id", "title", "year"], progress):
+        for movie_id, title, year in chunk:
+            movie_lookup[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+            movie_titles.append(title)
+            movie_years.append(year)
+
+    # First pass: count each person's movies
+    num_people = len(person_ids)
+    counts = zeros(num_people + 1)
+    for person, _ in read_stars(directory, person_lookup, movie_lookup):
+        counts[person + 1] += 1
+    for i in range(num_people):
+        counts[i + 1] += counts[i]
+
+    # Second pass: place every movie in its person's segment
+    person_movies = zeros(counts[-1])
+    cursor = counts[:-1]
+    for person, movie in read_stars(directory, person_lookup, movie_lookup,
+                                    progress):
+        person_movies[cursor[person]] = movie
+        cursor[person] += 1
+    del person_lookup, movie_lookup, cursor
+
+    # Sort each segment and drop duplicate rows, compacting in place
+    person_offsets = array(INDEX, [0])
+    end = 0
+    for person in range(num_people):
+        segment = sorted(set(person_movies[counts[person]:counts[person + 1]]))
+        person_movies[end:end + len(segment)] = array(INDEX, segment)
+        end += len(segment)
+        person_offsets.append(end)
+    del person_movies[end:], counts
+
+    movie_offsets, movie_stars = transpose(
+        person_offsets, person_movies, len(movie_ids))
+
+    id_order = array(INDEX, sorted(range(num_people),
+                                   key=person_ids.__getitem__))
+    name_order = array(INDEX, sorted(range(num_people),
+                                     key=lambda p: person_names[p].lower()))
+    movie_order = array(INDEX, sorted(range(len(movie_ids)),
+                                      key=movie_ids.__getitem__))
+
+    return Graph(person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 id_order, name_order, movie_order)
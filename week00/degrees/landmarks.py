@@ -0,0 +1,241 @@
+"""
+Landmark distance index for the compact degrees graph.
+
+A handful of well-connected "landmark" people are picked and a
+breadth-first search from each of them records every person's degree of
+separation from that landmark. By the triangle inequality, for any
+landmark L the distance between s and t is at least |d(L, s) - d(L, t)|
+and at most d(L, s) + d(L, t), so a query gets lower and upper bounds in
+O(k) array reads. `pruned_path` uses the same bounds to cut the exact
+search short.
+
+The index is written to `landmarks.index` next to the CSV files and is
+rebuilt when they change, like the graph snapshot.
+
+Usage: python landmarks.py [directory] [--landmarks K]
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import INDEX
+from snapshot import SOURCES, open_graph, source_stamps
+
+FILENAME = "landmarks.index"
+MAGIC = b"DEGLMRK1"
+
+# Default number of landmarks
+LANDMARKS = 16
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Magic, then (size, mtime_ns) of every source, landmark and people counts
+HEADER = struct.Struct(f"<8s{2 * len(SOURCES)}qqq")
+
+
+class LandmarkIndex():
+    def __init__(self, landmarks, distances):
+        # Person indices of the landmarks
+        self.landmarks = landmarks
+
+        # One byte per person for each landmark
+        self.distances = distances
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two people. Both are None if the people are known not to be
+        connected; upper is None if no landmark reaches both of them.
+        """
+        lower, upper = 1, None
+        for distance in self.distances:
+            s, t = distance[source], distance[target]
+            if (s == UNREACHABLE) != (t == UNREACHABLE):
+                return None, None
+            if s == UNREACHABLE:
+                continue
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        if source == target:
+            return 0, 0
+        return lower, upper
+
+    def heuristic(self, target):
+        """
+        Returns a function giving a lower bound on the distance from any
+        person to the target, or None for people it cannot reach.
+        """
+        columns = [(distance, distance[target]) for distance in self.distances]
+
+        def estimate(person):
+            best = 0
+            for distance, t in columns:
+                s = distance[person]
+                if (s == UNREACHABLE) != (t == UNREACHABLE):
+                    return None
+                if s != UNREACHABLE and abs(s - t) > best:
+                    best = abs(s - t)
+            return best
+
+        return estimate
+
+
+def bfs_distances(graph, source):
+    """
+    Returns a bytearray of every person's distance from the source,
+    read off the parents of `Graph.bfs_tree`.
+    """
+    parents, _ = graph.bfs_tree(source)
+    distances = bytearray([UNREACHABLE]) * graph.num_people()
+    distances[source] = 0
+    for person in range(graph.num_people()):
+        # Walk up to the nearest person with a known distance, then
+        # number the people passed on the way back down
+        chain = []
+        while distances[person] == UNREACHABLE and parents[person] != -1:
+            chain.append(person)
+            person = parents[person]
+        depth = distances[person]
+        if depth == UNREACHABLE:
+            continue
+        for person in reversed(chain):
+            depth = min(depth + 1, UNREACHABLE - 1)
+            distances[person] = depth
+    return distances
+
+
+def select_landmarks(graph, k):
+    """
+    Returns the k people with the most co-star slots, the sum of the cast
+    sizes of their movies.
+    """
+    def degree(person):
+        return sum(graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+                   for movie in graph.movies_for(person))
+    return sorted(range(graph.num_people()), key=degree, reverse=True)[:k]
+
+
+def build_index(graph, k=LANDMARKS):
+    landmarks = select_landmarks(graph, k)
+    return LandmarkIndex(landmarks,
+                         [bfs_distances(graph, landmark)
+                          for landmark in landmarks])
+
+
+def index_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def write_index(index, directory):
+    path = index_path(directory)
+    temporary = path + ".tmp"
+    people = len(index.distances[0]) if index.distances else 0
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, *source_stamps(directory),
+                            len(index.landmarks), people))
+        f.write(array(INDEX, index.landmarks).tobytes())
+        for distances in index.distances:
+            f.write(distances)
+    os.replace(temporary, path)
+
+
+def read_index(directory, k=LANDMARKS):
+    """
+    Returns the memory-mapped index of `directory`, or None if there is
+    none with k landmarks or it is out of date.
+    """
+    try:
+        with open(index_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < HEADER.size:
+        return None
+    magic, *stamps, count, people = HEADER.unpack_from(buffer)
+    # `build_index` picks at most one landmark per person
+    k = min(k, people)
+    if magic != MAGIC or count != k or stamps != source_stamps(directory):
+        return None
+
+    view = memoryview(buffer)
+    start = HEADER.size + count * array(INDEX).itemsize
+    landmarks = list(view[HEADER.size:start].cast(INDEX))
+    distances = [view[start + i * people:start + (i + 1) * people]
+                 for i in range(count)]
+    return LandmarkIndex(landmarks, distances)
+
+
+def open_index(graph, directory, k=LANDMARKS):
+    """
+    Returns the landmark index of `directory`, building and
+    writing it first if needed.
+    """
+    index = read_index(directory, k)
+    if index is not None:
+        return index
+
+    index = build_index(graph, k)
+    try:
+        write_index(index, directory)
+    except OSError as e:
+        print(f"Could not write landmark index: {e}", file=sys.stderr)
+    return index
+
+
+def pruned_path(graph, index, source, target):
+    """
+    Returns the shortest list of (movie, person) index pairs that connect
+    the source to the target, or None if there is no path.
+
+    Runs `Graph.shortest_path`, using the index to answer disconnected
+    pairs without searching and to prune: a person reached at depth d
+    whose landmark lower bound to the other end is h cannot be on a path
+    shorter than d + h, so they are not expanded when that exceeds the
+    upper bound for the whole query.
+    """
+    lower, upper = index.bounds(source, target)
+    if lower is None:
+        return None
+    if source == target:
+        return []
+
+    if upper is None:
+        return graph.shortest_path(source, target)
+
+    towards_target = index.heuristic(target)
+    towards_source = index.heuristic(source)
+
+    def prune(person, depth, forward):
+        estimate = towards_target if forward else towards_source
+        remaining = estimate(person)
+        return remaining is None or depth + remaining > upper
+
+    return graph.shortest_path(source, target, prune)
+
+
+def main():
+    args = sys.argv[1:]
+    k = LANDMARKS
+    if "--landmarks" in args:
+        position = args.index("--landmarks")
+        k = int(args[position + 1])
+        del args[position:position + 2]
+    if len(args) > 1:
+        sys.exit("Usage: python landmarks.py [directory] [--landmarks K]")
+    directory = args[0] if len(args) == 1 else "large"
+
+    if read_index(directory, k) is not None:
+        print(f"{index_path(directory)} is up to date.")
+        return
+    write_index(build_index(open_graph(directory), k), directory)
+    print(f"Wrote {index_path(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
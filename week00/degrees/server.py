@@ -0,0 +1,246 @@
+"""
+Local HTTP/JSON service for degrees of separation.
+
+Loads the data once and answers
+
+    GET /path?source=NAME&target=NAME
+
+with the same JSON object `batch.py` writes for a pair. Searches run in a
+pool of worker processes that inherit the loaded data, at most
+--searches of them at a time, and requests for a pair already being
+searched wait for that search. A request that takes longer than
+--timeout seconds gets a 504; its search keeps its worker until it
+finishes, and a search that fails gets a 500. Answers for recent pairs
+are kept in an LRU cache and served without a search. GET /health
+reports the cache, search and error counters.
+
+The server only listens on localhost; `fetch` is a minimal client for it.
+
+Usage: python server.py [directory] [--compact] [--port PORT]
+                        [--searches N] [--timeout SECONDS] [--cache N]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import batch
+import degrees
+
+HOST = "127.0.0.1"
+PORT = 8050
+
+# Default limits
+SEARCHES = 4
+TIMEOUT = 10.0
+CACHE_SIZE = 1024
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict",
+           500: "Internal Server Error", 504: "Gateway Timeout"}
+
+
+def search(source, target):
+    """
+    Runs in a worker process: returns (degrees, path) for two person ids.
+    """
+    path = degrees.shortest_path(source, target)
+    if path is None:
+        return None, None
+    return len(path), batch.describe(path)
+
+
+class Server():
+    def __init__(self, executor, searches=SEARCHES, timeout=TIMEOUT,
+                 cache_size=CACHE_SIZE):
+        self.executor = executor
+        self.slots = asyncio.Semaphore(searches)
+        self.timeout = timeout
+        self.cache = batch.TreeCache(cache_size)
+
+        # Searches running in the pool, by (source, target) person ids
+        self.pending = dict()
+        self.stats = {"requests": 0, "cache_hits": 0, "searches": 0,
+                      "timeouts": 0, "errors": 0}
+
+    async def answer(self, query):
+        """
+        Returns (status, JSON object) for the query string of /path.
+        """
+        params = parse_qs(query)
+        if "source" not in params or "target" not in params:
+            return 400, {"error": "source and target are required"}
+        source_name, target_name = params["source"][0], params["target"][0]
+
+        people = []
+        for name in [source_name, target_name]:
+            person_ids = degrees.person_ids_for_name(name)
+            if len(person_ids) == 0:
+                return 404, {"error": f"person not found: {name}"}
+            if len(person_ids) > 1:
+                return 409, {"error": f"ambiguous name: {name}",
+                             "candidates": sorted(person_ids)}
+            people.append(person_ids[0])
+
+        key = tuple(people)
+        result = self.cache.get(key)
+        if result is not None:
+            self.stats["cache_hits"] += 1
+            return 200, dict(result, source=source_name, target=target_name,
+                             cached=True)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            future = self.pending.get(key)
+            if future is None:
+                await asyncio.wait_for(self.slots.acquire(), self.timeout)
+
+                # Another request may have searched the pair meanwhile
+                result = self.cache.get(key)
+                future = self.pending.get(key)
+                if result is not None or future is not None:
+                    self.slots.release()
+                if result is not None:
+                    self.stats["cache_hits"] += 1
+                    return 200, dict(result, source=source_name,
+                                     target=target_name, cached=True)
+                if future is None:
+                    future = self.start_search(key)
+            # Shielded so a timeout leaves the search running for the
+            # other requests waiting on it and for the cache
+            length, path = await asyncio.wait_for(
+                asyncio.shield(future), max(0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            return 504, {"error": f"search took over {self.timeout} seconds"}
+        except Exception as error:
+            self.stats["errors"] += 1
+            return 500, {"error": f"search failed: {error!r}"}
+
+        return 200, {"degrees": length, "path": path, "source": source_name,
+                     "target": target_name, "cached": False}
+
+    def start_search(self, key):
+        """
+        Runs `search` in the pool on a slot already taken. The slot is
+        freed and the answer cached when the worker finishes, even if
+        every request waiting for it has timed out.
+        """
+        self.stats["searches"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self.executor, search, *key)
+        except BaseException:
+            self.slots.release()
+            raise
+        self.pending[key] = future
+
+        def finished(future):
+            self.slots.release()
+            del self.pending[key]
+            if not future.cancelled() and future.exception() is None:
+                length, path = future.result()
+                self.cache.add(key, {"degrees": length, "path": path})
+
+        future.add_done_callback(finished)
+        return future
+
+    async def handle(self, reader, writer):
+        """
+        Serves one HTTP request per connection.
+        """
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            self.stats["requests"] += 1
+
+            parts = request.decode("latin-1").split()
+            if len(parts) != 3:
+                status, body = 400, {"error": "malformed request"}
+            elif parts[0] != "GET":
+                status, body = 405, {"error": "only GET is supported"}
+            else:
+                url = urlsplit(parts[1])
+                if url.path == "/path":
+                    status, body = await self.answer(url.query)
+                elif url.path == "/health":
+                    status, body = 200, dict(self.stats,
+                                             cached=len(self.cache.trees))
+                else:
+                    status, body = 404, {"error": f"no route {url.path}"}
+
+            data = json.dumps(body).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def fetch(path, host=HOST, port=PORT):
+    """
+    Minimal client: GETs `path` from the server and returns
+    (status, JSON object).
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+                 f"Connection: close\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(body)
+
+
+async def serve(args):
+    with ProcessPoolExecutor(args.searches, mp_context=batch.fork_context(),
+                             initializer=batch.init_worker,
+                             initargs=(args.directory, args.compact, 0)) \
+            as executor:
+        # Fork the workers up front, before any connection is open
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(executor, int)
+                               for _ in range(args.searches)])
+        server = Server(executor, args.searches, args.timeout, args.cache)
+        listener = await asyncio.start_server(server.handle, HOST, args.port)
+        print(f"Serving on http://{HOST}:{args.port}/path", file=sys.stderr)
+        async with listener:
+            await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve degrees of separation over local HTTP.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the data into the compact graph")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--searches", metavar="N", type=int, default=SEARCHES,
+                        help="maximum number of concurrent searches")
+    parser.add_argument("--timeout", metavar="SECONDS", type=float,
+                        default=TIMEOUT, help="per-request time limit")
+    parser.add_argument("--cache", metavar="N", type=int, default=CACHE_SIZE,
+                        help="number of answers to keep")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, args.compact)
+    print("Data loaded.", file=sys.stderr)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Persistent binary snapshot of a compact degrees `Graph`.
+
+The first compact load of a directory compiles its CSV files into
+`degrees.snapshot` next to them. Later loads memory-map that file and wrap
+its sections in memoryviews, so no CSV is parsed and nothing is copied
+until it is read. The snapshot records the size and mtime of every CSV and
+is recompiled as soon as one of them changes.
+
+Usage: python snapshot.py [directory]
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+from graph import INDEX, OFFSET, Graph, StringTable, load_graph, peak_rss, \
+    report_progress
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP1"
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Order of the sections in the file
+ARRAYS = ["person_offsets", "person_movies", "movie_offsets", "movie_stars",
+          "id_order", "name_order", "movie_order"]
+STRINGS = ["person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years"]
+
+# Magic, then (size, mtime_ns) of every source, then section count
+HEADER = struct.Struct(f"<8s{2 * len(SOURCES)}qq")
+
+# Offset and length in bytes of each section
+SECTION = struct.Struct("<qq")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns (size, mtime_ns) for every CSV file in `directory`.
+    """
+    stamps = []
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stamps.extend([stat.st_size, stat.st_mtime_ns])
+    return stamps
+
+
+def write_snapshot(graph, directory):
+    """
+    Writes `graph` to the snapshot file of `directory`.
+    """
+    sections = [memoryview(getattr(graph, name)).cast("B") for name in ARRAYS]
+    for name in STRINGS:
+        table = getattr(graph, name)
+        sections.extend([memoryview(table.offsets).cast("B"),
+                         memoryview(table.blob).cast("B")])
+
+    # Sections start on 8-byte boundaries so every memoryview can be cast
+    position = HEADER.size + SECTION.size * len(sections)
+    table = []
+    for section in sections:
+        position += -position % 8
+        table.append((position, len(section)))
+        position += len(section)
+
+    path = snapshot_path(directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, *source_stamps(directory), len(sections)))
+        for offset, length in table:
+            f.write(SECTION.pack(offset, length))
+        for (offset, length), section in zip(table, sections):
+            f.write(bytes(offset - f.tell()))
+            f.write(section)
+    os.replace(temporary, path)
+
+
+def read_snapshot(directory):
+    """
+    Returns a `Graph` backed by the memory-mapped snapshot of `directory`,
+    or None if there is no snapshot or it is out of date.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < HEADER.size:
+        return None
+    magic, *stamps, count = HEADER.unpack_from(buffer)
+    if magic != MAGIC or count != len(ARRAYS) + 2 * len(STRINGS) or \
+            stamps != source_stamps(directory):
+        return None
+
+    view = memoryview(buffer)
+    sections = []
+    for i in range(count):
+        offset, length = SECTION.unpack_from(
+            buffer, HEADER.size + i * SECTION.size)
+        sections.append(view[offset:offset + length])
+
+    fields = {}
+    for name in ARRAYS:
+        fields[name] = sections.pop(0).cast(INDEX)
+    for name in STRINGS:
+        offsets = sections.pop(0).cast(OFFSET)
+        fields[name] = StringTable(offsets, sections.pop(0))
+    return Graph(**fields)
+
+
+def open_graph(directory):
+    """
+    Returns the graph of `directory`, from its snapshot if that is up to
+    date, otherwise by loading the CSV files and writing a new snapshot.
+    """
+    graph = read_snapshot(directory)
+    if graph is not None:
+        return graph
+
+    graph = load_graph(directory, report_progress)
+    try:
+        write_snapshot(graph, directory)
+    except OSError as e:
+        print(f"Could not write snapshot: {e}", file=sys.stderr)
+    return graph
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    if read_snapshot(directory) is not None:
+        print(f"{snapshot_path(directory)} is up to date.")
+        return
+    write_snapshot(load_graph(directory, report_progress), directory)
+    peak = peak_rss()
+    rss = "" if peak is None else f" Peak RSS {peak:.0f} MiB."
+    print(f"Wrote {snapshot_path(directory)}.{rss}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -18,8 +21,16 @@ class Node():
 
 
 class StackFrontier():
+    """
+    Last-in first-out frontier.
+
+    Nodes are kept in a deque so both ends can be popped in O(1), and the
+    states currently in the frontier are counted in a dict so that
+    `contains_state` does not have to scan the nodes.
+    """
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
         self.num_explored = 0
 
     def __str__(self):
@@ -30,9 +41,10 @@ class StackFrontier():
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -41,9 +53,16 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard_state(node.state)
             return node
+
+    def discard_state(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
     
     def get_num(self):
         return self.num_explored
@@ -53,11 +72,14 @@ class StackFrontier():
 
 
 class QueueFrontier(StackFrontier):
+    """
+    First-in first-out frontier.
+    """
 
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard_state(node.state)
             return node
@@ -0,0 +1,229 @@
+"""
+Counts the positions minimax visits on every second move of a game, and
+times a full minimax over list boards against one over bitboards.
+
+Usage: python benchmark.py
+"""
+
+import copy
+import math
+import time
+
+import bitboard
+import solutions
+import tictactoe as ttt
+
+
+# The original list board functions, kept as a baseline
+def list_player(board):
+    x_count = 0
+    o_count = 0
+    for row in board:
+        for sqr in row:
+            if sqr == ttt.X:
+                x_count += 1
+            elif sqr == ttt.O:
+                o_count += 1
+    return ttt.X if x_count <= o_count else ttt.O
+
+
+def list_actions(board):
+    actions = []
+    for row in range(3):
+        for col in range(3):
+            square = board[row][col]
+            if square == ttt.EMPTY:
+                actions.append((row, col))
+    return actions
+
+
+def list_result(board, action):
+    board_cp = copy.deepcopy(board)
+    if board_cp[action[0]][action[1]] == ttt.EMPTY:
+        board_cp[action[0]][action[1]] = list_player(board)
+        return(board_cp)
+    else:
+        raise ValueError("Wrong action")
+
+
+def list_winner(board):
+    winner = None
+    count = 0
+
+    # Check rows for winner
+    for row in range(3):
+        for col in range(3):
+            if count == 3:
+                return winner
+            if ((board[row][col] != ttt.EMPTY and count == 0) or
+                    (count > 0 and board[row][col] == winner)):
+                winner = board[row][col]
+                count += 1
+            else:
+                count = 0
+                winner = None
+                break
+
+    # Check colomns for winner
+    for col in range(3):
+        for row in range(3):
+            if count == 3:
+                return winner
+            if ((board[row][col] != ttt.EMPTY and count == 0) or
+                    (count > 0 and board[row][col] == winner)):
+                winner = board[row][col]
+                count += 1
+            else:
+                count = 0
+                winner = None
+                break
+
+    # Check diagonal
+    col = -1
+    step = 1
+    for side in range(2):
+        for row in range(3):
+            if count == 3:
+                return winner
+            if ((board[row][col+step] != ttt.EMPTY and count == 0) or
+                    (count > 0 and board[row][col+step] == winner)):
+                winner = board[row][col+step]
+                count += 1
+                col += step
+            else:
+                count = 0
+                winner = None
+                col = 3
+                step = -1
+                break
+    return winner
+
+
+def list_terminal(board):
+    return list_winner(board) != None or len(list_actions(board)) == 0
+
+
+def list_utility(board):
+    result = list_winner(board)
+    if result == ttt.X:
+        return 1
+    elif result == ttt.O:
+        return -1
+    else:
+        return 0
+
+
+# Positions visited by the baseline search
+baseline_nodes = 0
+
+
+def plain_max_value(board):
+    """
+    `ttt.max_value` as it was before pruning and the transposition
+    table, kept as a baseline.
+    """
+    global baseline_nodes
+    baseline_nodes += 1
+    if list_terminal(board):
+        return list_utility(board)
+    v = -math.inf
+    for action in list_actions(board):
+        v = max(v, plain_min_value(list_result(board, action)))
+    return v
+
+
+def plain_min_value(board):
+    global baseline_nodes
+    baseline_nodes += 1
+    if list_terminal(board):
+        return list_utility(board)
+    v = math.inf
+    for action in list_actions(board):
+        v = min(v, plain_max_value(list_result(board, action)))
+    return v
+
+
+def plain_minimax(board):
+    """
+    Scores every action the way `ttt.minimax` does, without the
+    random choice.
+    """
+    search = plain_min_value if list_player(board) == ttt.X else plain_max_value
+    return [search(list_result(board, action))
+            for action in list_actions(board)]
+
+
+def bits_max_value(x, o):
+    """
+    The same full search over bitboards.
+    """
+    global baseline_nodes
+    baseline_nodes += 1
+    if bitboard.terminal(x, o):
+        return bitboard.score(x, o)
+    v = -math.inf
+    for cell in bitboard.empty_cells(x, o):
+        v = max(v, bits_min_value(x | 1 << cell, o))
+    return v
+
+
+def bits_min_value(x, o):
+    global baseline_nodes
+    baseline_nodes += 1
+    if bitboard.terminal(x, o):
+        return bitboard.score(x, o)
+    v = math.inf
+    for cell in bitboard.empty_cells(x, o):
+        v = min(v, bits_max_value(x, o | 1 << cell))
+    return v
+
+
+def bits_minimax(board):
+    x, o = ttt.to_bits(board)
+    if bitboard.x_to_move(x, o):
+        return [bits_min_value(x | 1 << cell, o)
+                for cell in bitboard.empty_cells(x, o)]
+    return [bits_max_value(x, o | 1 << cell)
+            for cell in bitboard.empty_cells(x, o)]
+
+
+def second_moves():
+    """
+    Returns the board after each possible first move.
+    """
+    board = ttt.initial_state()
+    return [ttt.result(board, action) for action in ttt.actions(board)]
+
+
+def main():
+    global baseline_nodes
+    boards = second_moves()
+
+    for label, search in [("minimax, lists", plain_minimax),
+                          ("minimax, bitboards", bits_minimax)]:
+        baseline_nodes = 0
+        start = time.perf_counter()
+        for board in boards:
+            search(board)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24}{baseline_nodes:>10} nodes {elapsed:8.3f}s "
+              f"{elapsed / baseline_nodes * 1e6:6.2f} us/node")
+
+    # Search without the solution table first, then with it
+    solutions.table = None
+    ttt.transpositions.clear()
+    for label in ["alpha-beta, cold table", "alpha-beta, warm table",
+                  "solution table"]:
+        if label == "solution table":
+            solutions.table = False
+        ttt.nodes_visited = 0
+        start = time.perf_counter()
+        for board in boards:
+            ttt.minimax(board)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24}{ttt.nodes_visited:>10} nodes {elapsed:8.3f}s")
+    print(f"{len(ttt.transpositions)} positions in the transposition table")
+
+
+if __name__ == "__main__":
+    main()
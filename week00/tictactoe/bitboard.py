@@ -0,0 +1,99 @@
+"""
+Bitboard representation of a Tic Tac Toe board.
+
+A board is a pair of 9-bit integers (x, o) with bit row * 3 + col set for
+every square that player holds. Moves are a single OR, the player to move
+follows from the number of bits set and a win is one of eight masks.
+"""
+
+# Every square set
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+]
+
+# Number of bits set in every 9-bit mask
+POPCOUNT = [bin(mask).count("1") for mask in range(FULL + 1)]
+
+# Cell indices (row * 3 + col) of every rotation and reflection of the board
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8),
+    (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0),
+    (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2),
+    (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (8, 5, 2, 7, 4, 1, 6, 3, 0),
+]
+
+
+def transform(mask, symmetry):
+    """
+    Returns `mask` with its squares moved by one of the `SYMMETRIES`.
+    """
+    moved = 0
+    for cell, source in enumerate(symmetry):
+        if mask >> source & 1:
+            moved |= 1 << cell
+    return moved
+
+
+# Every 9-bit mask under each symmetry
+TRANSFORMS = [[transform(mask, symmetry) for mask in range(FULL + 1)]
+              for symmetry in SYMMETRIES]
+
+# Masks that contain a line
+WINS = [any(mask & line == line for line in WIN_MASKS)
+        for mask in range(FULL + 1)]
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn.
+    """
+    return POPCOUNT[x] <= POPCOUNT[o]
+
+
+def empty_cells(x, o):
+    """
+    Returns the indices of the empty squares, in row-major order.
+    """
+    taken = x | o
+    return [cell for cell in range(9) if not taken >> cell & 1]
+
+
+def play(x, o, cell):
+    """
+    Returns the board after the player to move takes `cell`.
+    """
+    if x_to_move(x, o):
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def score(x, o):
+    """
+    Returns 1 if X has a line, -1 if O has, 0 otherwise.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def terminal(x, o):
+    return WINS[x] or WINS[o] or x | o == FULL
+
+
+def key(x, o):
+    """
+    Returns an integer that is the same for a board and all of its
+    rotations and reflections.
+    """
+    return min(table[x] | table[o] << 9 for table in TRANSFORMS)
@@ -0,0 +1,262 @@
+"""
+m,n,k-game player: k in a row wins on a board of m rows and n columns.
+
+Boards are the same lists of X, O and EMPTY as in `tictactoe`, searched as
+bitboards of m * n bits. Boards larger than 3x3 are far too big to search
+to the end, so `minimax` runs an iterative-deepening alpha-beta search and
+returns the best move of the deepest search that finished within the time
+budget. Positions below the search horizon are scored by a heuristic that
+counts the lines each player could still complete.
+"""
+
+import math
+import time
+
+import tictactoe
+from tictactoe import X, O, EMPTY
+
+# Default seconds to spend on a move
+TIME_BUDGET = 1.0
+
+# Score of a won position, well above any heuristic score
+WIN = 1000000
+
+# Nodes searched between checks of the clock
+CLOCK_INTERVAL = 1024
+
+# Transposition table entries kept before it is cleared
+TABLE_SIZE = 1000000
+
+# Bounds a transposition table entry can hold
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class Timeout(Exception):
+    pass
+
+
+def popcount(mask):
+    return bin(mask).count("1")
+
+
+class Game():
+    def __init__(self, m=3, n=3, k=3, budget=TIME_BUDGET):
+        self.m = m
+        self.n = n
+        self.k = k
+        self.budget = budget
+        self.full = (1 << (m * n)) - 1
+
+        # Every set of k cells in a row, column or diagonal
+        self.lines = []
+        for row in range(m):
+            for col in range(n):
+                for drow, dcol in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_row = row + drow * (k - 1)
+                    end_col = col + dcol * (k - 1)
+                    if 0 <= end_row < m and 0 <= end_col < n:
+                        mask = 0
+                        for i in range(k):
+                            mask |= 1 << self.cell(row + drow * i,
+                                                   col + dcol * i)
+                        self.lines.append(mask)
+
+        # Lines through each cell, the only ones a move there can complete
+        self.lines_through = [[mask for mask in self.lines if mask >> cell & 1]
+                              for cell in range(m * n)]
+
+        # Cells in the order moves are tried: nearest the center first
+        self.order = sorted(
+            range(m * n),
+            key=lambda cell: (abs(cell // n - (m - 1) / 2) +
+                              abs(cell % n - (n - 1) / 2)))
+
+        # Heuristic value of a line holding stones of one player only
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        # (depth, score, bound, best cell) of searched positions by
+        # (player to move, opponent) bitboards
+        self.transpositions = {}
+
+        # Number of positions searched, when the current search ends and
+        # an optional threading.Event that ends it early
+        self.nodes = 0
+        self.deadline = math.inf
+        self.cancelled = None
+
+    def cell(self, row, col):
+        return row * self.n + col
+
+    def to_bits(self, board):
+        """
+        Returns the (x, o) bitboard of a list board.
+        """
+        x = o = 0
+        for row in range(self.m):
+            for col in range(self.n):
+                if board[row][col] == X:
+                    x |= 1 << self.cell(row, col)
+                elif board[row][col] == O:
+                    o |= 1 << self.cell(row, col)
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the list board of an (x, o) bitboard.
+        """
+        return [[X if x >> self.cell(row, col) & 1 else
+                 O if o >> self.cell(row, col) & 1 else EMPTY
+                 for col in range(self.n)]
+                for row in range(self.m)]
+
+    def initial_state(self):
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        x, o = self.to_bits(board)
+        return X if popcount(x) <= popcount(o) else O
+
+    def actions(self, board):
+        x, o = self.to_bits(board)
+        return [divmod(cell, self.n) for cell in range(self.m * self.n)
+                if not (x | o) >> cell & 1]
+
+    def result(self, board, action):
+        row, col = action
+        if not (0 <= row < self.m and 0 <= col < self.n) or \
+                board[row][col] != EMPTY:
+            raise ValueError("Wrong action")
+        board = [list(squares) for squares in board]
+        board[row][col] = self.player(board)
+        return board
+
+    def has_line(self, stones):
+        return any(stones & mask == mask for mask in self.lines)
+
+    def winner(self, board):
+        x, o = self.to_bits(board)
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        x, o = self.to_bits(board)
+        return self.has_line(x) or self.has_line(o) or x | o == self.full
+
+    def utility(self, board):
+        winner = self.winner(board)
+        return 1 if winner == X else -1 if winner == O else 0
+
+    def evaluate(self, mine, theirs):
+        """
+        Returns the heuristic score of a position for the player to move,
+        who holds `mine`.
+        """
+        score = 0
+        for mask in self.lines:
+            a, b = mine & mask, theirs & mask
+            if a and not b:
+                score += self.weights[popcount(a)]
+            elif b and not a:
+                score -= self.weights[popcount(b)]
+        return score
+
+    def negamax(self, mine, theirs, depth, alpha, beta):
+        """
+        Returns the score of a position for the player to move, searched
+        `depth` moves deep with alpha-beta pruning. Raises `Timeout` once
+        the deadline has passed or the search is cancelled.
+        """
+        self.nodes += 1
+        if self.nodes % CLOCK_INTERVAL == 0 and (
+                time.perf_counter() > self.deadline or
+                (self.cancelled is not None and self.cancelled.is_set())):
+            raise Timeout
+        taken = mine | theirs
+        if taken == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(mine, theirs)
+
+        key = (mine, theirs)
+        entry = self.transpositions.get(key)
+        first = None
+        if entry is not None:
+            entry_depth, v, bound, first = entry
+            if entry_depth >= depth and (
+                    bound == EXACT or (bound == LOWER and v >= beta) or
+                    (bound == UPPER and v <= alpha)):
+                return v
+
+        # Try the best move of an earlier search first
+        cells = [cell for cell in self.order if not taken >> cell & 1]
+        if first is not None:
+            cells.remove(first)
+            cells.insert(0, first)
+
+        original_alpha = alpha
+        best, best_cell = -math.inf, None
+        for cell in cells:
+            stones = mine | 1 << cell
+            if any(stones & mask == mask for mask in self.lines_through[cell]):
+                # Sooner wins score higher
+                v = WIN + depth
+            else:
+                v = -self.negamax(theirs, stones, depth - 1, -beta, -alpha)
+            if v > best:
+                best, best_cell = v, cell
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                break
+
+        if len(self.transpositions) >= TABLE_SIZE:
+            self.transpositions.clear()
+        if best <= original_alpha:
+            bound = UPPER
+        elif best >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[key] = (depth, best, bound, best_cell)
+        return best
+
+    def minimax(self, board, cancelled=None):
+        """
+        Returns the best action found for the current player within the
+        time budget, searching one move deeper at a time. Setting the
+        `cancelled` event stops the search early.
+        """
+        x, o = self.to_bits(board)
+        mine, theirs = (x, o) if popcount(x) <= popcount(o) else (o, x)
+        empty = [cell for cell in self.order if not (x | o) >> cell & 1]
+        best = empty[0]
+
+        self.deadline = time.perf_counter() + self.budget
+        self.cancelled = cancelled
+        for depth in range(1, len(empty) + 1):
+            try:
+                v = self.negamax(mine, theirs, depth, -math.inf, math.inf)
+            except Timeout:
+                break
+            best = self.transpositions[(mine, theirs)][3]
+            # Stop once the outcome is settled
+            if abs(v) >= WIN:
+                break
+        self.deadline = math.inf
+        self.cancelled = None
+        return divmod(best, self.n)
+
+
+def new_game(size, budget=TIME_BUDGET):
+    """
+    Returns the player for a board size (rows, columns, in a row to win):
+    the exact 3x3 solver in `tictactoe`, or the time-limited m,n,k search
+    with `budget` seconds a move for larger boards.
+    """
+    if tuple(size) == (3, 3, 3):
+        return tictactoe
+    return Game(*size, budget=budget)
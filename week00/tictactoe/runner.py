@@ -2,7 +2,9 @@ import pygame
 import sys
 import time
 
+import mnk
 import tictactoe as ttt
+from worker import MoveWorker
 
 pygame.init()
 size = width, height = 600, 400
@@ -17,15 +19,27 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+# Board sizes to choose from as (rows, columns, in a row to win)
+sizes = [(3, 3, 3), (4, 4, 4), (5, 5, 4)]
+
+
+size = sizes[0]
+game = mnk.new_game(size)
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = game.initial_state()
+ai = MoveWorker()
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            ai.shutdown()
             sys.exit()
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            # Abandon the game and go back to the menu
+            ai.cancel()
+            user = None
+            board = game.initial_state()
 
     screen.fill(black)
 
@@ -53,10 +67,31 @@ while True:
         pygame.draw.rect(screen, white, playOButton)
         screen.blit(playO, playORect)
 
+        # Draw board size buttons, the chosen one outlined
+        sizeButtons = []
+        for i, option in enumerate(sizes):
+            sizeButton = pygame.Rect((i + 1) * (width / 4) - 50,
+                                     (height / 2) + 90, 100, 40)
+            label = f"{option[0]}x{option[1]}"
+            if option[2] != min(option[:2]):
+                label += f", {option[2]}"
+            sizeText = mediumFont.render(label, True, white)
+            sizeRect = sizeText.get_rect()
+            sizeRect.center = sizeButton.center
+            pygame.draw.rect(screen, white, sizeButton,
+                             3 if option == size else 1)
+            screen.blit(sizeText, sizeRect)
+            sizeButtons.append((sizeButton, option))
+
         # Check if button is clicked
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1:
             mouse = pygame.mouse.get_pos()
+            for sizeButton, option in sizeButtons:
+                if sizeButton.collidepoint(mouse) and option != size:
+                    size = option
+                    game = mnk.new_game(size)
+                    board = game.initial_state()
             if playXButton.collidepoint(mouse):
                 time.sleep(0.2)
                 user = ttt.X
@@ -67,13 +102,14 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        rows, cols = len(board), len(board[0])
+        tile_size = min(80, 260 // max(rows, cols))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -83,24 +119,30 @@ while True:
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
+                    if tile_size < 80:
+                        move = pygame.transform.smoothscale(
+                            move, (move.get_width() * tile_size // 80,
+                                   move.get_height() * tile_size // 80))
                     moveRect = move.get_rect()
                     moveRect.center = rect.center
                     screen.blit(move, moveRect)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
                 title = f"Game Over: {winner} wins."
         elif user == player:
             title = f"Play as {user}"
+        elif ai.error is not None:
+            title = "Computer failed, press Escape."
         else:
             title = f"Computer thinking..."
         title = largeFont.render(title, True, white)
@@ -108,24 +150,23 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
-        if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+        # Check for AI move, computed in the background
+        if user != player and not game_over and ai.error is None:
+            if not ai.busy():
+                ai.start(game, board)
             else:
-                ai_turn = True
+                move = ai.poll()
+                if move is not None:
+                    board = game.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -140,7 +181,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = game.initial_state()
+                    ai.cancel()
 
     pygame.display.flip()
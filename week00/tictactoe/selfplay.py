@@ -0,0 +1,151 @@
+"""
+Headless self-play harness for the Tic Tac Toe AI.
+
+Plays N games of the AI against itself or against random moves and prints
+JSON metrics: games per second, positions searched per AI move, move
+latency percentiles and the outcome distribution. Against random moves
+the AI plays X in even games and O in odd ones.
+
+Usage: python selfplay.py [--games N] [--opponent ai|random]
+                          [--size M N K] [--budget SECONDS] [--no-table]
+                          [--processes N] [--seed S]
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+import mnk
+import solutions
+import tictactoe as ttt
+
+
+def nodes_searched(game):
+    return ttt.nodes_visited if game is ttt else game.nodes
+
+
+def play_game(game, opponent, index, seed):
+    """
+    Plays one game and returns the winner, the player the AI was against
+    random moves and its moves as (seconds, nodes searched) pairs.
+    """
+    random.seed(seed + index)
+    ai_player = ttt.X if index % 2 == 0 else ttt.O
+    board = game.initial_state()
+    moves = []
+    while not game.terminal(board):
+        if opponent == "random" and game.player(board) != ai_player:
+            move = random.choice(game.actions(board))
+        else:
+            nodes = nodes_searched(game)
+            start = time.perf_counter()
+            move = game.minimax(board)
+            moves.append((time.perf_counter() - start,
+                          nodes_searched(game) - nodes))
+        board = game.result(board, move)
+    return game.winner(board), ai_player, moves
+
+
+# Player of a worker process, created by `init_worker`
+worker_game = None
+
+
+def init_worker(size, budget, table):
+    global worker_game
+    worker_game = mnk.new_game(size, budget)
+    if not table:
+        solutions.table = None
+
+
+def play_worker(task):
+    opponent, index, seed = task
+    return play_game(worker_game, opponent, index, seed)
+
+
+def percentile(values, p):
+    """
+    Returns the nearest-rank p-th percentile of sorted `values`.
+    """
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * p // 100))
+    return values[int(rank) - 1]
+
+
+def run(games, opponent="ai", size=(3, 3, 3), budget=mnk.TIME_BUDGET,
+        table=True, processes=1, seed=0):
+    """
+    Plays the games and returns the metrics as a JSON-ready dict.
+    """
+    tasks = [(opponent, index, seed) for index in range(games)]
+    start = time.perf_counter()
+    if processes > 1:
+        with multiprocessing.Pool(processes, initializer=init_worker,
+                                  initargs=(size, budget, table)) as pool:
+            results = pool.map(play_worker, tasks)
+    else:
+        init_worker(size, budget, table)
+        results = [play_worker(task) for task in tasks]
+    elapsed = time.perf_counter() - start
+
+    outcomes = {"X": 0, "O": 0, "tie": 0}
+    ai_losses = 0
+    latencies, nodes = [], []
+    for winner, ai_player, moves in results:
+        outcomes[winner or "tie"] += 1
+        if winner is not None and winner != ai_player:
+            ai_losses += 1
+        for seconds, searched in moves:
+            latencies.append(seconds)
+            nodes.append(searched)
+    latencies.sort()
+
+    metrics = {
+        "games": games,
+        "opponent": opponent,
+        "size": list(size),
+        "table": table,
+        "processes": processes,
+        "seconds": round(elapsed, 3),
+        "games_per_second": round(games / elapsed, 2) if elapsed else None,
+        "ai_moves": len(latencies),
+        "nodes_per_move": round(sum(nodes) / len(nodes), 1) if nodes else 0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3)
+            if latencies else None,
+            "p99": round(percentile(latencies, 99) * 1000, 3)
+            if latencies else None,
+        },
+        "outcomes": outcomes,
+    }
+    if opponent == "random":
+        metrics["ai_losses"] = ai_losses
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play the AI against itself or random moves.")
+    parser.add_argument("--games", metavar="N", type=int, default=100)
+    parser.add_argument("--opponent", choices=["ai", "random"], default="ai")
+    parser.add_argument("--size", metavar=("M", "N", "K"), type=int, nargs=3,
+                        default=[3, 3, 3],
+                        help="rows, columns and stones in a row to win")
+    parser.add_argument("--budget", metavar="SECONDS", type=float,
+                        default=mnk.TIME_BUDGET,
+                        help="time per move on boards other than 3x3")
+    parser.add_argument("--no-table", dest="table", action="store_false",
+                        help="search instead of using the solution table")
+    parser.add_argument("--processes", metavar="N", type=int, default=1)
+    parser.add_argument("--seed", metavar="S", type=int, default=0)
+    args = parser.parse_args()
+
+    metrics = run(args.games, args.opponent, tuple(args.size), args.budget,
+                  args.table, args.processes, args.seed)
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Precomputed scores of every reachable Tic Tac Toe position.
+
+Positions are solved once, up to rotation and reflection, and written to
+`solutions.bin` as a sorted array of board keys and an array of scores.
+`minimax` loads the file the first time it is called and looks up the
+score of each move instead of searching.
+
+Usage: python solutions.py
+"""
+
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+import bitboard
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "solutions.bin")
+MAGIC = b"TTTSOLV1"
+
+# Magic, then number of positions
+HEADER = struct.Struct("<8sq")
+
+# Array types of the keys and scores
+KEY = "i"
+SCORE = "b"
+
+
+class SolutionTable():
+    def __init__(self, keys, scores):
+        # Sorted `bitboard.key` of every position
+        self.keys = keys
+
+        # Score of each position, 1 if X wins, -1 if O wins, 0 for a tie
+        self.scores = scores
+
+    def score(self, x, o):
+        """
+        Returns the score of the (x, o) bitboard, or None if the
+        position is not in the table.
+        """
+        key = bitboard.key(x, o)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.scores[i]
+        return None
+
+
+def solve():
+    """
+    Returns the score of every position reachable from the empty board,
+    by board key.
+    """
+    scores = {}
+
+    def value(x, o):
+        key = bitboard.key(x, o)
+        if key in scores:
+            return scores[key]
+        if bitboard.terminal(x, o):
+            v = bitboard.score(x, o)
+        else:
+            values = [value(*bitboard.play(x, o, cell))
+                      for cell in bitboard.empty_cells(x, o)]
+            v = max(values) if bitboard.x_to_move(x, o) else min(values)
+        scores[key] = v
+        return v
+
+    value(0, 0)
+    return scores
+
+
+def write_table(scores, path=FILENAME):
+    keys = sorted(scores)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(keys)))
+        f.write(array(KEY, keys).tobytes())
+        f.write(array(SCORE, [scores[key] for key in keys]).tobytes())
+    os.replace(temporary, path)
+
+
+def read_table(path=FILENAME):
+    """
+    Returns the `SolutionTable` stored at `path`, or None if there is no
+    valid table there.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+
+    if len(data) < HEADER.size:
+        return None
+    magic, count = HEADER.unpack_from(data)
+    keys, scores = array(KEY), array(SCORE)
+    end = HEADER.size + count * (keys.itemsize + scores.itemsize)
+    if magic != MAGIC or len(data) != end:
+        return None
+    middle = HEADER.size + count * keys.itemsize
+    keys.frombytes(data[HEADER.size:middle])
+    scores.frombytes(data[middle:])
+    return SolutionTable(keys, scores)
+
+
+# Table loaded by `load`, False until it is first called
+table = False
+
+
+def load():
+    """
+    Returns the solution table, reading it on the first call, or None if
+    there is none.
+    """
+    global table
+    if table is False:
+        table = read_table()
+    return table
+
+
+def main():
+    scores = solve()
+    write_table(scores)
+    print(f"Wrote {len(scores)} positions to {FILENAME}.")
+
+
+if __name__ == "__main__":
+    main()
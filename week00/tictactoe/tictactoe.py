@@ -3,14 +3,88 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
 import random
 
+import bitboard
+import solutions
+
 X = "X"
 O = "O"
 EMPTY = None
 
 
+# Bounds a transposition table entry can hold
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Scores of searched positions by board key: (score, bound)
+transpositions = {}
+
+# Number of positions the alpha-beta search has visited
+nodes_visited = 0
+
+
+def to_bits(board):
+    """
+    Returns the (x, o) bitboard of a list board.
+    """
+    x = o = 0
+    for row in range(3):
+        for col in range(3):
+            square = board[row][col]
+            if square == X:
+                x |= 1 << (row * 3 + col)
+            elif square == O:
+                o |= 1 << (row * 3 + col)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list board of an (x, o) bitboard.
+    """
+    return [[X if x >> (row * 3 + col) & 1 else
+             O if o >> (row * 3 + col) & 1 else EMPTY
+             for col in range(3)]
+            for row in range(3)]
+
+
+def board_key(board):
+    """
+    Returns an integer that is the same for a board and all of its
+    rotations and reflections.
+    """
+    return bitboard.key(*to_bits(board))
+
+
+def lookup(key, alpha, beta):
+    """
+    Returns the stored score of a board if it settles the search
+    within (alpha, beta), None otherwise.
+    """
+    entry = transpositions.get(key)
+    if entry is None:
+        return None
+    v, bound = entry
+    if (bound == EXACT or (bound == LOWER and v >= beta) or
+            (bound == UPPER and v <= alpha)):
+        return v
+    return None
+
+
+def store(key, v, alpha, beta):
+    """
+    Stores the score of a board searched within (alpha, beta).
+    """
+    if v <= alpha:
+        transpositions[key] = (v, UPPER)
+    elif v >= beta:
+        transpositions[key] = (v, LOWER)
+    else:
+        transpositions[key] = (v, EXACT)
+
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -24,167 +98,175 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    x_count = 0
-    o_count = 0
-    for row in board:
-        for sqr in row:
-            if sqr == X:
-                x_count += 1
-            elif sqr == O:
-                o_count += 1
-    return X if x_count <= o_count else O
+    return X if bitboard.x_to_move(*to_bits(board)) else O
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    actions = []
-    for row in range(3):
-        for col in range(3):
-            square = board[row][col]
-            if square == EMPTY:
-                actions.append((row, col))
-    return actions
+    return [divmod(cell, 3) for cell in bitboard.empty_cells(*to_bits(board))]
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    board_cp = copy.deepcopy(board)
-    if board_cp[action[0]][action[1]] == EMPTY:
-        board_cp[action[0]][action[1]] = player(board)
-        return(board_cp)
-    else:
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise ValueError("Wrong action")
+    x, o = to_bits(board)
+    cell = i * 3 + j
+    if (x | o) >> cell & 1:
         raise ValueError("Wrong action")
+    return to_board(*bitboard.play(x, o, cell))
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    winner = None
-    count = 0
-    
-    # Check rows for winner
-    for row in range(3):
-        for col in range(3):
-            if count == 3:
-                return winner
-            if ((board[row][col] != EMPTY and count == 0) or 
-                    (count > 0 and board[row][col] == winner)):
-                winner = board[row][col]
-                count += 1
-            else:
-                count = 0
-                winner = None
-                break
-
-    # Check colomns for winner
-    for col in range(3):
-        for row in range(3):
-            if count == 3:
-                return winner
-            if ((board[row][col] != EMPTY and count == 0) or 
-                    (count > 0 and board[row][col] == winner)):
-                winner = board[row][col]
-                count += 1 
-            else:
-                count = 0
-                winner = None
-                break
-    
-    # Check diagonal
-    col = -1
-    step = 1
-    for side in range(2):
-        for row in range(3):
-            if count == 3:
-                return winner
-            if ((board[row][col+step] != EMPTY and count == 0) or 
-                    (count > 0 and board[row][col+step] == winner)):
-                winner = board[row][col+step]
-                count += 1
-                col += step
-            else:
-                count = 0
-                winner = None
-                col = 3
-                step = -1
-                break 
-    return winner        
+    score = bitboard.score(*to_bits(board))
+    if score == 1:
+        return X
+    elif score == -1:
+        return O
+    return None
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    return winner(board) != None or len(actions(board)) == 0
+    return bitboard.terminal(*to_bits(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    result = winner(board)
-    if result == X:
-        return 1
-    elif result == O:
-        return -1
-    else:
-        return 0
+    return bitboard.score(*to_bits(board))
 
 
 def max_value(board):
     """
     Recursively check all possible outcomes and returns max score
     """
+    x, o = to_bits(board)
+    if bitboard.x_to_move(x, o):
+        return _max_bits(x, o)
+    return _off_turn(x, o, True)
+
+
+def min_value(board):
+    """
+    Recursively check all possible outcomes and returns min score
+    """
+    x, o = to_bits(board)
+    if not bitboard.x_to_move(x, o):
+        return _min_bits(x, o)
+    return _off_turn(x, o, False)
+
+
+def _off_turn(x, o, maximize):
+    """
+    Returns the score max_value (or min_value) gives a board where the
+    other player is to move: moves still alternate between the players,
+    while levels alternate between max and min starting with `maximize`.
+    Such scores are not scores of the game, so they are searched without
+    the transposition table.
+    """
+    if bitboard.terminal(x, o):
+        return bitboard.score(x, o)
+    scores = [_off_turn(*bitboard.play(x, o, cell), not maximize)
+              for cell in bitboard.empty_cells(x, o)]
+    return max(scores) if maximize else min(scores)
+
+
+def _max_bits(x, o, alpha=-math.inf, beta=math.inf):
+    """
+    Returns max score of the (x, o) bitboard, searching with alpha-beta
+    pruning. A result <= alpha is only an upper bound and a result >= beta
+    only a lower bound on the score.
+    """
+    global nodes_visited
+    nodes_visited += 1
+    if bitboard.terminal(x, o):
+        return bitboard.score(x, o)
+    key = bitboard.key(x, o)
+    cached = lookup(key, alpha, beta)
+    if cached is not None:
+        return cached
 
-    if terminal(board):
-        return utility(board)
     v = -math.inf
-    for action in actions(board):
-        v = max(v, min_value(result(board, action)))
+    for cell in bitboard.empty_cells(x, o):
+        v = max(v, _min_bits(x | 1 << cell, o, max(alpha, v), beta))
+        if v >= beta:
+            break
+    store(key, v, alpha, beta)
     return v
 
 
-def min_value(board):
+def _min_bits(x, o, alpha=-math.inf, beta=math.inf):
     """
-    Recursively check all possible outcomes and returns min score
+    Returns min score of the (x, o) bitboard, searching with alpha-beta
+    pruning.
     """
-    if terminal(board):
-        return utility(board)
+    global nodes_visited
+    nodes_visited += 1
+    if bitboard.terminal(x, o):
+        return bitboard.score(x, o)
+    key = bitboard.key(x, o)
+    cached = lookup(key, alpha, beta)
+    if cached is not None:
+        return cached
+
     v = math.inf
-    for action in actions(board):
-        v = min(v, max_value(result(board, action)))
+    for cell in bitboard.empty_cells(x, o):
+        v = min(v, _max_bits(x, o | 1 << cell, alpha, min(beta, v)))
+        if v <= alpha:
+            break
+    store(key, v, alpha, beta)
     return v
-    
+
+
+def score_after(x, o, cell):
+    """
+    Returns the score of the (x, o) bitboard after the player to move
+    takes `cell`, from the solution table when it has the position and
+    by searching otherwise.
+    """
+    x, o = bitboard.play(x, o, cell)
+    table = solutions.load()
+    if table is not None:
+        v = table.score(x, o)
+        if v is not None:
+            return v
+    if bitboard.x_to_move(x, o):
+        return _max_bits(x, o)
+    return _min_bits(x, o)
+
 
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+    Scores come from the precomputed solution table; positions it lacks
+    are searched, keeping scores in `transpositions` between calls.
     """
     actions_optimal = []
     actions_no = []
-    cur_player = player(board)
-    pos_actions = actions(board)
-    if len(pos_actions) == 9:
-        return(random.choice(pos_actions)) 
-    for action in pos_actions:
-        if cur_player == X:
-            v = min_value(result(board, action))
-            if v == 1:
-                actions_optimal.append(action)
-            elif v == 0:
-                actions_no.append(action)
-        else:
-            v = max_value(result(board, action)) 
-            if v == -1:
-                actions_optimal.append(action)
-            elif v == 0:
-                actions_no.append(action)
+    x, o = to_bits(board)
+    cells = bitboard.empty_cells(x, o)
+    if len(cells) == 9:
+        return divmod(random.choice(cells), 3)
+    best = 1 if bitboard.x_to_move(x, o) else -1
+    for cell in cells:
+        v = score_after(x, o, cell)
+        if v == best:
+            actions_optimal.append(divmod(cell, 3))
+        elif v == 0:
+            actions_no.append(divmod(cell, 3))
     if len(actions_optimal):
         return random.choice(actions_optimal)
     else:
-        return random.choice(actions_no)
\ No newline at end of file
+        return random.choice(actions_no)
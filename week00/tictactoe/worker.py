@@ -0,0 +1,85 @@
+"""
+Background computation of AI moves for `runner.py`.
+
+The search runs on a worker thread so the pygame loop keeps drawing and
+handling events; the loop calls `poll` once a frame to pick the move up.
+"""
+
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import mnk
+
+# Least seconds the AI appears to think, so its move does not land at once
+DELAY = 0.5
+
+
+class MoveWorker():
+    def __init__(self, delay=DELAY):
+        self.delay = delay
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # Future of the move being computed and the event that cancels it
+        self.future = None
+        self.cancelled = None
+
+        # Exception the last search raised, until the next start or cancel
+        self.error = None
+
+    def busy(self):
+        return self.future is not None
+
+    def start(self, game, board):
+        """
+        Starts computing the move for `board`, cancelling any earlier one.
+        """
+        self.cancel()
+        self.error = None
+        self.cancelled = threading.Event()
+        self.future = self.executor.submit(self.think, game, board,
+                                           self.cancelled)
+
+    def think(self, game, board, cancelled):
+        start = time.perf_counter()
+        if isinstance(game, mnk.Game):
+            move = game.minimax(board, cancelled)
+        else:
+            move = game.minimax(board)
+        cancelled.wait(self.delay - (time.perf_counter() - start))
+        return move
+
+    def poll(self):
+        """
+        Returns the computed move once it is ready, None until then. If the
+        search failed, the error is printed and kept in `error` rather than
+        raised into the game loop.
+        """
+        if self.future is None or not self.future.done():
+            return None
+        future = self.future
+        self.future = None
+        self.cancelled = None
+        try:
+            return future.result()
+        except Exception as error:
+            traceback.print_exception(error, file=sys.stderr)
+            self.error = error
+            return None
+
+    def cancel(self):
+        """
+        Stops the move being computed, if any; its result is discarded.
+        """
+        if self.future is not None:
+            self.cancelled.set()
+            self.future.cancel()
+        self.future = None
+        self.cancelled = None
+        self.error = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,204 @@
+"""
+Times evaluating the puzzle knowledge bases over every model, model
+checking every symbol of every puzzle, and each model_check method on a
+chain of characters accusing each other and on generated puzzles as the
+number of symbols grows.
+
+Usage: python benchmark.py [--repeat N] [--symbols MAX] [--characters MAX]
+                           [--seed S]
+"""
+
+import argparse
+import itertools
+import random
+import time
+
+import generator
+import logic
+import puzzle
+from logic import And, Biconditional, Not, Or, Symbol, model_check
+
+# Most symbols the enumerate and parallel methods are timed on
+ENUMERATE_LIMIT = 20
+
+# Most symbols each method is timed on in generated puzzles, which have
+# fewer models than the chain and so stop enumeration early less often
+GENERATED_LIMITS = {"enumerate": 16, "parallel": 16, "truth table": 24}
+
+
+def original_model_check(knowledge, query):
+    """
+    `logic.model_check` as it was before sentences were compiled: a
+    recursive split over dict models, kept as a baseline.
+    """
+    def check_all(knowledge, query, symbols, model):
+        if not symbols:
+            if knowledge.evaluate(model):
+                return query.evaluate(model)
+            return True
+        remaining = symbols.copy()
+        p = remaining.pop()
+        model_true = model.copy()
+        model_true[p] = True
+        model_false = model.copy()
+        model_false[p] = False
+        return (check_all(knowledge, query, remaining, model_true) and
+                check_all(knowledge, query, remaining, model_false))
+
+    symbols = set.union(knowledge.symbols(), query.symbols())
+    return check_all(knowledge, query, symbols, dict())
+
+
+def puzzles():
+    return [("Puzzle 0", puzzle.knowledge0), ("Puzzle 1", puzzle.knowledge1),
+            ("Puzzle 2", puzzle.knowledge2), ("Puzzle 3", puzzle.knowledge3)]
+
+
+def symbols():
+    return [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight, puzzle.BKnave,
+            puzzle.CKnight, puzzle.CKnave]
+
+
+def timed(function, repeat):
+    """
+    Returns the seconds per call of `function`, best of `repeat` runs.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def evaluation(repeat):
+    names = [symbol.name for symbol in symbols()]
+    models = [dict(zip(names, values))
+              for values in itertools.product([False, True],
+                                              repeat=len(names))]
+    print(f"Evaluating each knowledge base in all {len(models)} models")
+    print(f"{'':<10}{'evaluate':>12}{'compiled':>12}{'interpreted':>12}")
+    for name, knowledge in puzzles():
+        compiled = knowledge.compile(names)
+        numbers = range(2 ** len(names))
+        tree = timed(lambda: [knowledge.evaluate(m) for m in models], repeat)
+        function = timed(lambda: [compiled(m) for m in numbers], repeat)
+        program = timed(lambda: [compiled.run(m) for m in numbers], repeat)
+        print(f"{name:<10}{tree * 1e6:>10.0f}us{function * 1e6:>10.0f}us"
+              f"{program * 1e6:>10.0f}us")
+
+
+def entail_all(knowledge):
+    """
+    Checks every symbol against one incremental knowledge base.
+    """
+    knowledge_base = logic.KnowledgeBase(knowledge)
+    return [knowledge_base.entails(symbol) for symbol in symbols()]
+
+
+def entailment(repeat):
+    print("Model checking all six symbols")
+    print(f"{'':<10}{'original':>12}{'model_check':>12}"
+          f"{'incremental':>12}")
+    for name, knowledge in puzzles():
+        before = timed(lambda: [original_model_check(knowledge, symbol)
+                                for symbol in symbols()], repeat)
+        after = timed(lambda: [model_check(knowledge, symbol)
+                               for symbol in symbols()], repeat)
+        incremental = timed(lambda: entail_all(knowledge), repeat)
+        print(f"{name:<10}{before * 1e3:>10.2f}ms{after * 1e3:>10.2f}ms"
+              f"{incremental * 1e3:>10.2f}ms")
+
+
+def chain_knowledge(n):
+    """
+    Returns a knowledge base of n characters where each says the next one
+    is a knave, and the last says the first is a knight, and the query
+    "the first is a knight".
+    """
+    knights = [Symbol(f"{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(n)]
+    knowledge = And()
+    for i in range(n):
+        knowledge.add(And(Or(knights[i], knaves[i]),
+                          Not(And(knights[i], knaves[i]))))
+        claim = knaves[i + 1] if i + 1 < n else knights[0]
+        knowledge.add(Biconditional(knights[i], claim))
+    return knowledge, knights[0]
+
+
+def scaling(repeat, max_symbols):
+    methods = ["enumerate", "parallel", "truth table", "sat"]
+    if logic.numpy is None:
+        methods.remove("truth table")
+    print("Model checking a chain of characters")
+    print(f"{'symbols':<10}" + "".join(f"{method:>14}" for method in methods))
+    for n in range(2, max_symbols // 2 + 1, 2):
+        knowledge, query = chain_knowledge(n)
+        row = f"{2 * n:<10}"
+        for method in methods:
+            if (method in ("enumerate", "parallel")
+                    and 2 * n > ENUMERATE_LIMIT):
+                row += f"{'-':>14}"
+                continue
+            seconds = timed(lambda: model_check(knowledge, query, method),
+                            max(1, repeat // 10))
+            row += f"{seconds * 1e3:>12.2f}ms"
+        print(row)
+
+
+def solve_generated(generated, method):
+    """
+    Decides every character of a generated puzzle, checking its knight and
+    knave symbols with one model_check method or, for "incremental", one
+    KnowledgeBase.
+    """
+    queries = generated.knights + generated.knaves
+    if method == "incremental":
+        knowledge_base = logic.KnowledgeBase(generated.knowledge)
+        return [knowledge_base.entails(query) for query in queries]
+    return [model_check(generated.knowledge, query, method)
+            for query in queries]
+
+
+def generated_scaling(repeat, max_characters, seed):
+    methods = ["enumerate", "parallel", "truth table", "sat", "incremental"]
+    if logic.numpy is None:
+        methods.remove("truth table")
+    rng = random.Random(seed)
+    print("Solving generated puzzles")
+    print(f"{'characters':<12}" +
+          "".join(f"{method:>14}" for method in methods))
+    for n in range(2, max_characters + 1, 2):
+        generated = generator.generate(n, rng=rng)
+        row = f"{n:<12}"
+        for method in methods:
+            if 2 * n > GENERATED_LIMITS.get(method, 2 * n):
+                row += f"{'-':>14}"
+                continue
+            seconds = timed(lambda: solve_generated(generated, method),
+                            max(1, repeat // 10))
+            row += f"{seconds * 1e3:>12.2f}ms"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", metavar="N", type=int, default=20)
+    parser.add_argument("--symbols", metavar="MAX", type=int, default=24)
+    parser.add_argument("--characters", metavar="MAX", type=int, default=20,
+                        help="most characters in a generated puzzle")
+    parser.add_argument("--seed", metavar="S", type=int, default=0)
+    args = parser.parse_args()
+    evaluation(args.repeat)
+    print()
+    entailment(args.repeat)
+    print()
+    scaling(args.repeat, args.symbols)
+    print()
+    generated_scaling(args.repeat, args.characters, args.seed)
+
+
+if __name__ == "__main__":
+    main()
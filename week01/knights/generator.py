@@ -0,0 +1,134 @@
+"""
+Generates random Knights and Knaves puzzles of N characters, each making
+statements about who is a knight and who is a knave, nested with the
+connectives of `logic`. Roles are drawn first and every statement is made
+true exactly when its speaker is a knight, so each puzzle has at least
+one solution.
+
+Usage: python generator.py [--characters N] [--statements S]
+                           [--depth D] [--seed S]
+"""
+
+import argparse
+import random
+
+from logic import (And, Biconditional, Implication, KnowledgeBase, Not, Or,
+                   Symbol)
+
+# Chance that a part of a statement is a plain claim about one character
+# rather than a connective, before the depth limit forces it
+CLAIM_CHANCE = 0.3
+
+
+def character_names(n):
+    """
+    Returns names for n characters: A to Z, then A1 to Z1 and so on.
+    """
+    return [chr(ord("A") + i % 26) + (str(i // 26) if i >= 26 else "")
+            for i in range(n)]
+
+
+class Puzzle():
+
+    def __init__(self, names):
+        self.names = names
+        self.knights = [Symbol(f"{name} is a Knight") for name in names]
+        self.knaves = [Symbol(f"{name} is a Knave") for name in names]
+
+        # Index of the speaker and sentence of every statement
+        self.statements = []
+
+        # Whether each character is a knight in the drawn solution
+        self.roles = []
+
+        self.knowledge = And()
+        for knight, knave in zip(self.knights, self.knaves):
+            self.knowledge.add(Or(knight, knave))
+            self.knowledge.add(Not(And(knight, knave)))
+
+    def say(self, speaker, sentence):
+        """
+        Adds a statement: the speaker is a knight exactly when it is true.
+        """
+        self.statements.append((speaker, sentence))
+        self.knowledge.add(Biconditional(self.knights[speaker], sentence))
+
+    def solution(self):
+        """
+        Returns the drawn solution as a model of the puzzle's symbols.
+        """
+        model = dict()
+        for knight, knave, role in zip(self.knights, self.knaves, self.roles):
+            model[knight.name] = role
+            model[knave.name] = not role
+        return model
+
+
+def claim(rng, puzzle, depth):
+    """
+    Returns a random statement nesting connectives up to `depth` deep.
+    """
+    if depth == 0 or rng.random() < CLAIM_CHANCE:
+        i = rng.randrange(len(puzzle.names))
+        return rng.choice([puzzle.knights[i], puzzle.knaves[i]])
+    connective = rng.choice([Not, And, Or, Implication, Biconditional])
+    if connective is Not:
+        return Not(claim(rng, puzzle, depth - 1))
+    if connective is And or connective is Or:
+        return connective(*[claim(rng, puzzle, depth - 1)
+                            for _ in range(rng.randint(2, 3))])
+    return connective(claim(rng, puzzle, depth - 1),
+                      claim(rng, puzzle, depth - 1))
+
+
+def generate(n, statements=1, depth=2, rng=random):
+    """
+    Returns a random puzzle of n characters making `statements` statements
+    each, nested up to `depth` connectives deep.
+    """
+    puzzle = Puzzle(character_names(n))
+    puzzle.roles = [rng.random() < 0.5 for _ in range(n)]
+    model = puzzle.solution()
+    for speaker in range(n):
+        for _ in range(statements):
+            sentence = claim(rng, puzzle, depth)
+            if sentence.evaluate(model) != puzzle.roles[speaker]:
+                sentence = sentence.operand if isinstance(sentence, Not) \
+                    else Not(sentence)
+            puzzle.say(speaker, sentence)
+    return puzzle
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate and solve a random Knights and Knaves puzzle.")
+    parser.add_argument("--characters", metavar="N", type=int, default=4)
+    parser.add_argument("--statements", metavar="S", type=int, default=1,
+                        help="statements each character makes")
+    parser.add_argument("--depth", metavar="D", type=int, default=2,
+                        help="how deeply statements nest connectives")
+    parser.add_argument("--seed", metavar="S", type=int, default=None)
+    args = parser.parse_args()
+
+    puzzle = generate(args.characters, args.statements, args.depth,
+                      random.Random(args.seed))
+    for speaker, sentence in puzzle.statements:
+        print(f"{puzzle.names[speaker]} says {sentence.formula()}")
+
+    knowledge_base = KnowledgeBase(puzzle.knowledge)
+    print("Solution")
+    undetermined = []
+    for name, knight, knave in zip(puzzle.names, puzzle.knights,
+                                   puzzle.knaves):
+        if knowledge_base.entails(knight):
+            print(f"    {knight}")
+        elif knowledge_base.entails(knave):
+            print(f"    {knave}")
+        else:
+            undetermined.append(name)
+    if undetermined:
+        print(f"    Undetermined: {', '.join(undetermined)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,127 @@
 import itertools
+import multiprocessing
+import weakref
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from sat import Solver
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Sentence():
+    """Sentences are immutable and hash-consed: building a sentence equal
+    to an existing one returns the existing object, so equal subtrees are
+    shared, and each sentence computes its hash and symbols only once.
+    The exception is `And`, which stays open to `add` until it is used
+    inside another sentence."""
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every sentence in use, by (class, operands)
+    interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, *operands):
+        """Returns the sentence of this class with these operands, creating
+        it if there is none yet."""
+        key = (cls, operands)
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = object.__new__(cls)
+            object.__setattr__(sentence, "_hash", None)
+            object.__setattr__(sentence, "_symbols", None)
+            sentence.initialize(*operands)
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def initialize(self, *operands):
+        """Sets the fields of a newly interned sentence."""
+        pass
+
+    def operands(self):
+        """Returns the arguments that build the sentence."""
+        return ()
+
+    def canonical(self):
+        """Returns the shared sentence equal to this one."""
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __reduce__(self):
+        return (type(self), self.operands())
+
+    def __eq__(self, other):
+        return self is other or (
+            type(self) is type(other) and hash(self) == hash(other)
+            and self.operands() == other.operands())
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", self.compute_hash())
+        return self._hash
+
+    def compute_hash(self):
+        return hash(type(self).__name__)
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def partial_evaluate(self, model, known):
+        """Evaluates the sentence in a partial model, which may leave symbols
+        out: True or False if every completion of the model agrees, None if
+        not. `known` maps subsentences to values already decided, and
+        the ones decided here are added to it."""
+        value = known.get(self)
+        if value is None:
+            value = self.decide(model, known)
+            if value is not None:
+                known[self] = value
+        return value
+
+    def decide(self, model, known):
+        """Three-valued evaluation of the sentence, see `partial_evaluate`."""
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns the symbols of the sentence as a cached frozenset."""
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", self.compute_symbols())
+        return self._symbols
+
+    def compute_symbols(self):
+        return frozenset()
+
+    def lower(self, positions, program):
+        """Appends the sentence to a postfix `Compiled` program, given the
+        bit position of every symbol."""
+        raise Exception("nothing to lower")
+
+    def compile(self, symbols=None):
+        """Returns the sentence as a `Compiled` function of models given as
+        integers, bit i holding the value of the i-th of `symbols`
+        (by default, the sentence's own symbols in sorted order)."""
+        if symbols is None:
+            symbols = sorted(self.symbols())
+        positions = {symbol: i for i, symbol in enumerate(symbols)}
+        program = array("i")
+        self.lower(positions, program)
+        return Compiled(symbols, program)
 
     @classmethod
     def validate(cls, sentence):
@@ -43,14 +151,21 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        # Symbols are interned by name, where 1 and True would be the same
+        if not isinstance(name, str):
+            raise TypeError("symbol name must be a string")
+        return cls.intern(name)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    def initialize(self, name):
+        object.__setattr__(self, "name", name)
 
-    def __hash__(self):
+    def operands(self):
+        return (self.name,)
+
+    def compute_hash(self):
         return hash(("symbol", self.name))
 
     def __repr__(self):
@@ -62,22 +177,36 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def decide(self, model, known):
+        return model.get(self.name)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def compute_symbols(self):
+        return frozenset([self.name])
+
+    def lower(self, positions, program):
+        try:
+            program.extend([SYMBOL, positions[self.name]])
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls.intern(operand.canonical())
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def initialize(self, operand):
+        object.__setattr__(self, "operand", operand)
 
-    def __hash__(self):
+    def operands(self):
+        return (self.operand,)
+
+    def compute_hash(self):
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -86,23 +215,47 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def decide(self, model, known):
+        value = self.operand.partial_evaluate(model, known)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def compute_symbols(self):
+        return self.operand.symbol_set()
+
+    def lower(self, positions, program):
+        self.operand.lower(positions, program)
+        program.append(NOT)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts", "frozen")
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
+        sentence = object.__new__(cls)
+        object.__setattr__(sentence, "_hash", None)
+        object.__setattr__(sentence, "_symbols", None)
+        object.__setattr__(sentence, "conjuncts",
+                           [conjunct.canonical() for conjunct in conjuncts])
+        object.__setattr__(sentence, "frozen", False)
+        return sentence
+
+    def operands(self):
+        return tuple(self.conjuncts)
+
+    def canonical(self):
+        """Freezes the conjunction and returns the shared one equal
+        to it."""
+        if not self.frozen:
+            object.__setattr__(self, "conjuncts", tuple(self.conjuncts))
+            object.__setattr__(self, "frozen", True)
+        return Sentence.interned.setdefault((And, self.conjuncts), self)
+
+    def compute_hash(self):
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -115,31 +268,57 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self.frozen:
+            raise TypeError("cannot add to a conjunction that is part of "
+                            "another sentence")
+        self.conjuncts.append(conjunct.canonical())
+        object.__setattr__(self, "_hash", None)
+        object.__setattr__(self, "_symbols", None)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def decide(self, model, known):
+        value = True
+        for conjunct in self.conjuncts:
+            conjunct_value = conjunct.partial_evaluate(model, known)
+            if conjunct_value is False:
+                return False
+            if conjunct_value is None:
+                value = None
+        return value
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def compute_symbols(self):
+        return frozenset().union(
+            *[conjunct.symbol_set() for conjunct in self.conjuncts])
+
+    def lower(self, positions, program):
+        for conjunct in self.conjuncts:
+            conjunct.lower(positions, program)
+        program.extend([AND, len(self.conjuncts)])
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(*[disjunct.canonical() for disjunct in disjuncts])
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    def initialize(self, *disjuncts):
+        object.__setattr__(self, "disjuncts", disjuncts)
 
-    def __hash__(self):
+    def operands(self):
+        return self.disjuncts
+
+    def compute_hash(self):
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -151,29 +330,48 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def decide(self, model, known):
+        value = False
+        for disjunct in self.disjuncts:
+            disjunct_value = disjunct.partial_evaluate(model, known)
+            if disjunct_value is True:
+                return True
+            if disjunct_value is None:
+                value = None
+        return value
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def compute_symbols(self):
+        return frozenset().union(
+            *[disjunct.symbol_set() for disjunct in self.disjuncts])
+
+    def lower(self, positions, program):
+        for disjunct in self.disjuncts:
+            disjunct.lower(positions, program)
+        program.extend([OR, len(self.disjuncts)])
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern(antecedent.canonical(), consequent.canonical())
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+    def initialize(self, antecedent, consequent):
+        object.__setattr__(self, "antecedent", antecedent)
+        object.__setattr__(self, "consequent", consequent)
 
-    def __hash__(self):
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    def compute_hash(self):
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -183,28 +381,47 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def decide(self, model, known):
+        antecedent = self.antecedent.partial_evaluate(model, known)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.partial_evaluate(model, known)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def compute_symbols(self):
+        return self.antecedent.symbol_set() | self.consequent.symbol_set()
+
+    def lower(self, positions, program):
+        self.antecedent.lower(positions, program)
+        self.consequent.lower(positions, program)
+        program.append(IMPLIES)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern(left.canonical(), right.canonical())
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+    def initialize(self, left, right):
+        object.__setattr__(self, "left", left)
+        object.__setattr__(self, "right", right)
 
-    def __hash__(self):
+    def operands(self):
+        return (self.left, self.right)
+
+    def compute_hash(self):
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
@@ -216,48 +433,512 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def decide(self, model, known):
+        left = self.left.partial_evaluate(model, known)
+        if left is None:
+            return None
+        right = self.right.partial_evaluate(model, known)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def compute_symbols(self):
+        return self.left.symbol_set() | self.right.symbol_set()
 
+    def lower(self, positions, program):
+        self.left.lower(positions, program)
+        self.right.lower(positions, program)
+        program.append(IFF)
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+# Operations of a `Compiled` program; SYMBOL is followed by the symbol's
+# bit position, AND and OR by their number of operands
+SYMBOL = 0
+NOT = 1
+AND = 2
+OR = 3
+IMPLIES = 4
+IFF = 5
 
-        # If model has an assignment for each symbol
-        if not symbols:
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
+class Compiled():
+    """Sentence lowered to a flat postfix program over models given as
+    integers, and to a Python function that evaluates it. Only the symbol
+    names and the program are pickled."""
+
+    def __init__(self, symbols, program):
+        self.symbols = list(symbols)
+        self.program = program
+        self.function = self.build()
+
+    def __getstate__(self):
+        return (self.symbols, self.program)
+
+    def __setstate__(self, state):
+        self.symbols, self.program = state
+        self.function = self.build()
+
+    def __call__(self, model):
+        """Evaluates the sentence in a model given as an integer."""
+        return self.function(model)
+
+    def encode(self, model):
+        """Returns the integer form of a model given as a dict."""
+        return sum(1 << i for i, symbol in enumerate(self.symbols)
+                   if model[symbol])
+
+    def evaluate(self, model):
+        """Evaluates the sentence in a model given as a dict."""
+        return self.function(self.encode(model))
+
+    def build(self):
+        """Returns a Python function of the model for the program, or the
+        program interpreter if the sentence nests too deeply to compile."""
+        stack = []
+        program = self.program
+        i = 0
+        while i < len(program):
+            op = program[i]
+            if op == SYMBOL:
+                stack.append(f"(m >> {program[i + 1]} & 1)")
+                i += 2
+            elif op == NOT:
+                stack.append(f"(not {stack.pop()})")
+                i += 1
+            elif op == AND or op == OR:
+                count = program[i + 1]
+                operands = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+                if not operands:
+                    stack.append("True" if op == AND else "False")
+                else:
+                    joiner = " and " if op == AND else " or "
+                    stack.append(f"({joiner.join(operands)})")
+                i += 2
+            else:
+                right, left = stack.pop(), stack.pop()
+                if op == IMPLIES:
+                    stack.append(f"(not {left} or {right})")
+                else:
+                    stack.append(f"((not {left}) == (not {right}))")
+                i += 1
+        try:
+            return eval(f"lambda m: bool({stack.pop()})")
+        except (SyntaxError, RecursionError, MemoryError):
+            return self.run
+
+    def run(self, model):
+        """Interprets the program with a stack."""
+        stack = []
+        program = self.program
+        i = 0
+        while i < len(program):
+            op = program[i]
+            if op == SYMBOL:
+                stack.append(model >> program[i + 1] & 1 == 1)
+                i += 2
+            elif op == NOT:
+                stack.append(not stack.pop())
+                i += 1
+            elif op == AND or op == OR:
+                count = program[i + 1]
+                operands = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+                stack.append(all(operands) if op == AND else any(operands))
+                i += 2
+            else:
+                right, left = stack.pop(), stack.pop()
+                if op == IMPLIES:
+                    stack.append(not left or right)
+                else:
+                    stack.append(left == right)
+                i += 1
+        return stack.pop()
+
+    def slices(self, columns):
+        """Evaluates the program over bit-sliced models: `columns[i]` packs
+        the values of symbol i for 64 models into each 64-bit word of a
+        NumPy array, and so does the result."""
+        ones = numpy.uint64(0xFFFFFFFFFFFFFFFF)
+        stack = []
+        program = self.program
+        i = 0
+        while i < len(program):
+            op = program[i]
+            if op == SYMBOL:
+                stack.append(columns[program[i + 1]])
+                i += 2
+            elif op == NOT:
+                stack.append(~stack.pop())
+                i += 1
+            elif op == AND or op == OR:
+                count = program[i + 1]
+                operands = stack[len(stack) - count:]
+                del stack[len(stack) - count:]
+                value = ones if op == AND else numpy.uint64(0)
+                for operand in operands:
+                    value = value & operand if op == AND else value | operand
+                stack.append(value)
+                i += 2
+            else:
+                right, left = stack.pop(), stack.pop()
+                if op == IMPLIES:
+                    stack.append(~left | right)
+                else:
+                    stack.append(~(left ^ right))
+                i += 1
+        return stack.pop()
+
+
+# Models are packed 64 to a 64-bit word; bit b of a word holds the model
+# whose number ends in b, and symbols below 6 are the same in every word
+WORD_SYMBOLS = 6
+WORD_PATTERNS = [0xAAAAAAAAAAAAAAAA, 0xCCCCCCCCCCCCCCCC, 0xF0F0F0F0F0F0F0F0,
+                 0xFF00FF00FF00FF00, 0xFFFF0000FFFF0000, 0xFFFFFFFF00000000]
+
+# Words of models evaluated at once by truth_table_entails
+CHUNK_WORDS = 1 << 14
+
+
+def truth_table_entails(knowledge, query, chunk_words=CHUNK_WORDS):
+    """Checks if knowledge base entails query by evaluating both over
+    whole chunks of the truth table at once with NumPy."""
+    if numpy is None:
+        raise Exception("truth table mode needs numpy")
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+
+    # Only the first 2^n bits count when there are fewer than 64 models
+    total = 2 ** len(symbols)
+    words = max(1, total >> WORD_SYMBOLS)
+    valid = numpy.uint64((1 << min(total, 64)) - 1)
+
+    for start in range(0, words, chunk_words):
+        index = numpy.arange(start, min(start + chunk_words, words),
+                             dtype=numpy.uint64)
+        columns = []
+        for i in range(len(symbols)):
+            if i < WORD_SYMBOLS:
+                columns.append(numpy.uint64(WORD_PATTERNS[i]))
+            else:
+                bit = (index >> numpy.uint64(i - WORD_SYMBOLS)) & \
+                    numpy.uint64(1)
+                columns.append(numpy.uint64(0) - bit)
+        counter = (knowledge.slices(columns) & ~query.slices(columns) &
+                   valid)
+        if numpy.any(counter):
+            return False
+    return True
+
+
+# Number of compiled sentences model_check keeps for reuse
+COMPILE_CACHE_SIZE = 128
+
+compile_cache = OrderedDict()
+
+
+def compile_cached(sentence, symbols):
+    """Returns sentence.compile(symbols), reusing an earlier result for an
+    equal sentence and symbol order."""
+    sentence = sentence.canonical()
+    key = (sentence, tuple(symbols))
+    compiled = compile_cache.get(key)
+    if compiled is None:
+        compiled = sentence.compile(symbols)
+        compile_cache[key] = compiled
+        if len(compile_cache) > COMPILE_CACHE_SIZE:
+            compile_cache.popitem(last=False)
+    else:
+        compile_cache.move_to_end(key)
+    return compiled
+
+
+# Above this many symbols, model_check asks the SAT solver instead of
+# enumerating every model
+SAT_THRESHOLD = 12
+
+
+class CNF():
+    """Tseitin encoding of sentences into clauses for a `sat.Solver`."""
+
+    def __init__(self, solver=None):
+        self.solver = Solver() if solver is None else solver
+
+        # Solver variable of every symbol name
+        self.variables = {}
+
+        # Literal standing for every sentence encoded so far
+        self.literals = {}
+
+    def variable(self, name):
+        """Returns the solver variable of a symbol name."""
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to the sentence, adding the
+        clauses that define it."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        sentence = sentence.canonical()
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            operands = sentence.conjuncts if isinstance(sentence, And) \
+                else sentence.disjuncts
+            literals = [self.literal(operand) for operand in operands]
+            v = self.solver.new_variable()
+            if isinstance(sentence, And):
+                # v <=> l1 ∧ ... ∧ ln
+                for literal in literals:
+                    add([-v, literal])
+                add([v] + [-literal for literal in literals])
+            else:
+                # v <=> l1 ∨ ... ∨ ln
+                for literal in literals:
+                    add([v, -literal])
+                add([-v] + literals)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.solver.new_variable()
+            add([-v, -a, b])
+            add([v, a])
+            add([v, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.solver.new_variable()
+            add([-v, -a, b])
+            add([-v, a, -b])
+            add([v, a, b])
+            add([v, -a, -b])
         else:
+            raise TypeError("must be a logical sentence")
+
+        self.literals[sentence] = v
+        return v
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when the sentence is true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+
+def sat_entails(knowledge, query):
+    """Checks if knowledge base entails query: if knowledge ∧ ¬query
+    is unsatisfiable."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    cnf.add(Not(query))
+    return not cnf.solver.solve()
+
+
+class KnowledgeBase():
+    """Sentences encoded once into a SAT solver that keeps its clauses,
+    learned clauses and variable activities between queries."""
+
+    def __init__(self, *sentences):
+        self.cnf = CNF()
+
+        # Assignments of symbol names under which every sentence holds,
+        # from satisfiable solves since the last sentence was added
+        self.models = []
+
+        self.solves = 0
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.cnf.add(sentence)
+        self.models = []
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query: if it is
+        unsatisfiable with the query false."""
+        Sentence.validate(query)
+
+        # A model found by an earlier query may already falsify this one
+        symbols = query.symbol_set()
+        for model in self.models:
+            if symbols <= model.keys() and not query.evaluate(model):
+                return False
+
+        # The literal is defined by clauses that any assignment of the
+        # symbols satisfies, so they stay in the solver for later queries
+        literal = self.cnf.literal(query)
+        self.solves += 1
+        solver = self.cnf.solver
+        if not solver.solve([-literal]):
+            return True
+        self.models.append({name: solver.model[variable]
+                            for name, variable in self.cnf.variables.items()})
+        return False
+
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+# Symbols each subproblem of a parallel model check fixes, making
+# 2^SPLIT_SYMBOLS subproblems
+SPLIT_SYMBOLS = 6
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
+# Models a worker checks between looks at whether to stop
+CANCEL_INTERVAL = 1 << 12
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+# Knowledge base, query, symbols fixed, all symbols and the stop flag of a
+# parallel model check, set in each worker by `init_split`
+split_problem = None
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+
+def init_split(knowledge, query, fixed, count, found):
+    global split_problem
+    split_problem = (knowledge, query, fixed, count, found)
+
+
+def check_split(first):
+    """Checks the query in every model whose first symbols are the bits of
+    `first`. Returns False on finding a counter-model."""
+    knowledge, query, fixed, count, found = split_problem
+    step = 1 << fixed
+    end = 1 << count
+    for start in range(first, end, step * CANCEL_INTERVAL):
+        # Another worker has found a counter-model
+        if found.is_set():
+            return True
+        for model in range(start, min(start + step * CANCEL_INTERVAL, end),
+                           step):
+            if knowledge(model) and not query(model):
+                found.set()
+                return False
+    return True
+
+
+def parallel_entails(knowledge, query, processes=None):
+    """Checks if knowledge base entails query by enumerating models in
+    `processes` worker processes, one subproblem for each assignment of the
+    first SPLIT_SYMBOLS symbols. The first counter-model stops them all."""
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    fixed = min(SPLIT_SYMBOLS, len(symbols))
+
+    # Workers get the compiled sentences, pickled as their programs
+    context = multiprocessing.get_context()
+    found = context.Event()
+    problem = (compile_cached(knowledge, symbols),
+               compile_cached(query, symbols), fixed, len(symbols), found)
+    with ProcessPoolExecutor(processes, mp_context=context,
+                             initializer=init_split,
+                             initargs=problem) as executor:
+        futures = [executor.submit(check_split, first)
+                   for first in range(2 ** fixed)]
+        for future in as_completed(futures):
+            if not future.result():
+                executor.shutdown(cancel_futures=True)
+                return False
+    return True
+
+
+def model_check(knowledge, query, method=None):
+    """Checks if knowledge base entails query. `method` is "enumerate",
+    "parallel", "sat" or "truth table"; by default models are enumerated
+    for up to SAT_THRESHOLD symbols and the SAT solver is used above
+    that."""
+    if method not in (None, "enumerate", "parallel", "sat", "truth table"):
+        raise ValueError(f"unknown method {method}")
+    if method == "sat":
+        return sat_entails(knowledge, query)
+    if method == "truth table":
+        return truth_table_entails(knowledge, query)
+    if method == "parallel":
+        return parallel_entails(knowledge, query)
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    # Too many models to enumerate
+    if method is None and len(symbols) > SAT_THRESHOLD:
+        return sat_entails(knowledge, query)
+
+    # Number the symbols so that a model is an integer, one bit per symbol
+    symbols = sorted(symbols)
+    knowledge = compile_cached(knowledge, symbols)
+    query = compile_cached(query, symbols)
+
+    # Check that query is true in every model where knowledge is true
+    return all(query(model) for model in range(2 ** len(symbols))
+               if knowledge(model))
+
+
+def model_symbols(knowledge, symbols):
+    """Returns the symbols models of the knowledge base assign, by default
+    its own in sorted order."""
+    if symbols is None:
+        return sorted(knowledge.symbols())
+    symbols = list(symbols)
+    for name in sorted(knowledge.symbol_set().difference(symbols)):
+        raise Exception(f"variable {name} not in model")
+    return symbols
+
+
+def enumerate_models(knowledge, symbols=None):
+    """Yields every model of `symbols` in which the knowledge base is true,
+    as a dict from symbol name to value. Symbols are assigned one at a time
+    and an assignment that already decides the knowledge base is not
+    split any further."""
+    symbols = model_symbols(knowledge, symbols)
+
+    def extend(model, known, i):
+        value = knowledge.partial_evaluate(model, known)
+        if value is False:
+            return
+        if value is True:
+            # Every way of completing the model is a model
+            rest = symbols[i:]
+            for values in itertools.product([True, False], repeat=len(rest)):
+                completed = model.copy()
+                completed.update(zip(rest, values))
+                yield completed
+            return
+        symbol = symbols[i]
+        for value in [True, False]:
+            model[symbol] = value
+            yield from extend(model, known.copy(), i + 1)
+        del model[symbol]
+
+    yield from extend(dict(), dict(), 0)
+
+
+def count_models(knowledge, symbols=None):
+    """Returns the number of models of `symbols` in which the knowledge base
+    is true, counting an assignment that already decides it in one step."""
+    symbols = model_symbols(knowledge, symbols)
+
+    def count(model, known, i):
+        value = knowledge.partial_evaluate(model, known)
+        if value is not None:
+            return 2 ** (len(symbols) - i) if value else 0
+        symbol = symbols[i]
+        total = 0
+        for value in [True, False]:
+            model[symbol] = value
+            total += count(model, known.copy(), i + 1)
+        del model[symbol]
+        return total
+
+    return count(dict(), dict(), 0)
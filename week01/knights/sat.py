@@ -0,0 +1,310 @@
+"""
+Conflict-driven clause learning SAT solver.
+
+Variables are positive integers and a literal is a variable or its
+negation. Every clause watches two of its literals and is only looked at
+when one of them becomes false, which makes unit propagation cheap. A
+conflict is analyzed back to its first unique implication point, the
+resulting clause is learned and the search jumps back to the level where
+that clause becomes unit. Variables are branched on by activity, bumped
+for every variable seen in a conflict.
+
+Clauses and learned clauses stay in the solver between calls to `solve`,
+which can take assumptions: literals that hold for that call only.
+"""
+
+import heapq
+
+# Factor activities grow by after each conflict, making recent ones count
+# for more
+DECAY = 1 / 0.95
+
+# Activities are scaled down when one exceeds this
+RESCALE = 1e100
+
+
+class Solver():
+
+    def __init__(self):
+        self.num_variables = 0
+
+        # Clauses of two or more literals; the first two are watched
+        self.clauses = []
+
+        # Clauses watching each literal, by `watch_index`
+        self.watches = [[], []]
+
+        # Per variable: value, decision level and index of the clause that
+        # implied it, None for decisions; index 0 is unused
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.level_starts = []
+
+        # Position in the trail up to which literals have been propagated
+        self.head = 0
+
+        # Branching order: activity of each variable, a heap of
+        # (-activity, variable) and the value each variable last had
+        self.activity = [0.0]
+        self.increment = 1.0
+        self.heap = []
+        self.phases = [False]
+
+        # Set once the clauses are unsatisfiable without any assumptions
+        self.unsatisfiable = False
+
+        # Satisfying assignment of the last successful `solve`, by variable
+        self.model = None
+
+        self.conflicts = 0
+        self.decisions = 0
+        self.learned = 0
+
+    def new_variable(self):
+        self.num_variables += 1
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        self.watches.extend([[], []])
+        heapq.heappush(self.heap, (0.0, self.num_variables))
+        return self.num_variables
+
+    def value(self, literal):
+        """
+        Returns True or False if the literal is assigned, None otherwise.
+        """
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def decision_level(self):
+        return len(self.level_starts)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, a list of literals at least one of which must hold.
+        Returns False if the clauses have become unsatisfiable.
+        """
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value is True or -literal in clause:
+                # Already satisfied, or a tautology
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            if self.propagate() is not None:
+                self.unsatisfiable = True
+        else:
+            self.attach(clause)
+        return not self.unsatisfiable
+
+    def attach(self, clause):
+        """
+        Stores a clause and watches its first two literals.
+        """
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[watch_index(clause[0])].append(index)
+        self.watches[watch_index(clause[1])].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = self.decision_level()
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by a unit clause. Returns the index
+        of a clause with all literals false, or None.
+        """
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches[watch_index(false_literal)]
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = self.clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                other = self.value(clause[0])
+                if other is True:
+                    kept.append(index)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[watch_index(clause[1])].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if other is False:
+                        kept.extend(watchers[position + 1:])
+                        watchers[:] = kept
+                        return index
+                    self.assign(clause[0], index)
+            watchers[:] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, asserting literal first,
+        and the decision level to jump back to.
+        """
+        level = self.decision_level()
+        learned = [None]
+        seen = set()
+        pending = 0
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        literal = None
+
+        while True:
+            for other in clause if literal is None else clause[1:]:
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest assigned literal of this level
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal of the highest remaining level second
+        deepest = max(range(1, len(learned)),
+                      key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > RESCALE:
+            self.activity = [activity / RESCALE for activity in self.activity]
+            self.increment /= RESCALE
+            self.heap = [(-self.activity[v], v)
+                         for v in range(1, self.num_variables + 1)
+                         if self.values[v] is None]
+            heapq.heapify(self.heap)
+        elif self.values[variable] is None:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above decision `level`.
+        """
+        if self.decision_level() <= level:
+            return
+        start = self.level_starts[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.level_starts[level:]
+        self.head = start
+
+    def pick_branch(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        while self.heap:
+            _, variable = heapq.heappop(self.heap)
+            if self.values[variable] is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        `assumptions` true, storing a satisfying assignment in `model`.
+        """
+        self.model = None
+        if self.unsatisfiable:
+            return False
+        self.backtrack(0)
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if self.decision_level() == 0:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.attach(learned))
+                    self.learned += 1
+                self.increment *= DECAY
+                continue
+
+            # Assumptions take the first decision levels, one each
+            if self.decision_level() < len(assumptions):
+                literal = assumptions[self.decision_level()]
+                value = self.value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.level_starts.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick_branch()
+            if variable is None:
+                self.model = {v: self.values[v]
+                              for v in range(1, self.num_variables + 1)}
+                self.backtrack(0)
+                return True
+            self.decisions += 1
+            self.level_starts.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable,
+                        None)
+
+
+def watch_index(literal):
+    """
+    Returns the position of a literal's watch list.
+    """
+    return 2 * literal if literal > 0 else -2 * literal + 1
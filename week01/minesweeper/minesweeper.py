@@ -1,6 +1,10 @@
+import collections
 import itertools
 import random
 
+# Largest part of the frontier searched for every arrangement of mines
+COMPONENT_LIMIT = 16
+
 
 class Minesweeper():
     """
@@ -136,6 +140,51 @@ class Sentence():
             self.cells.remove(cell)
 
 
+class RandomSet():
+    """
+    Set of cells that can also pick a random member in constant time,
+    by keeping its members in a list along with each one's position.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = []
+        self.positions = dict()
+        for cell in cells:
+            self.add(cell)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """
+        Removes a cell if present, moving the last cell into its place.
+        """
+        position = self.positions.pop(cell, None)
+        if position is None:
+            return
+        last = self.cells.pop()
+        if position < len(self.cells):
+            self.cells[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        """
+        Returns a random cell, or None if there are none.
+        """
+        return random.choice(self.cells) if self.cells else None
+
+
 class MinesweeperAI():
     """
     Minesweeper game player
@@ -154,26 +203,103 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Safe cells not clicked on yet, and cells neither clicked on
+        # nor known to be mines
+        self.safe_moves = RandomSet()
+        self.unknown = RandomSet(
+            itertools.product(range(height), range(width)))
+
+        # Sentences about the game known to be true, by id; the id of the
+        # sentence on each set of cells; and the ids of the sentences
+        # each cell appears in
+        self.sentences = dict()
+        self.by_cells = dict()
+        self.cell_sentences = dict()
+        self.ids = itertools.count()
+
+        # Ids of sentences to draw conclusions from, and the cells of every
+        # sentence processed since the frontier was last searched
+        self.queue = collections.deque()
+        self.touched = set()
+
+    @property
+    def knowledge(self):
+        """
+        List of sentences about the game known to be true.
+        """
+        return list(self.sentences.values())
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
+        if cell in self.mines:
+            return
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unknown.discard(cell)
+        for sentence_id in self.cell_sentences.pop(cell, set()):
+            self.update(sentence_id,
+                        lambda sentence: sentence.mark_mine(cell))
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
         """
+        if cell in self.safes:
+            return
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        for sentence_id in self.cell_sentences.pop(cell, set()):
+            self.update(sentence_id,
+                        lambda sentence: sentence.mark_safe(cell))
+
+    def add_sentence(self, cells, count):
+        """
+        Adds a sentence unless one on the same cells is already known,
+        and queues it to draw conclusions from.
+        """
+        key = frozenset(cells)
+        if not key or key in self.by_cells:
+            return
+        sentence_id = next(self.ids)
+        self.sentences[sentence_id] = Sentence(cells, count)
+        self.by_cells[key] = sentence_id
+        for cell in key:
+            self.cell_sentences.setdefault(cell, set()).add(sentence_id)
+        self.queue.append(sentence_id)
+
+    def remove_sentence(self, sentence_id):
+        """
+        Forgets a sentence and its place in the index by cell.
+        """
+        sentence = self.sentences.pop(sentence_id)
+        key = frozenset(sentence.cells)
+        if self.by_cells.get(key) == sentence_id:
+            del self.by_cells[key]
+        for cell in key:
+            ids = self.cell_sentences.get(cell)
+            if ids is not None:
+                ids.discard(sentence_id)
+                if not ids:
+                    del self.cell_sentences[cell]
+
+    def update(self, sentence_id, change):
+        """
+        Applies `change` to a sentence and queues it again, or drops it if
+        it has become empty or the same as another sentence.
+        """
+        sentence = self.sentences[sentence_id]
+        del self.by_cells[frozenset(sentence.cells)]
+        change(sentence)
+        key = frozenset(sentence.cells)
+        if not key or key in self.by_cells:
+            self.remove_sentence(sentence_id)
+            return
+        self.by_cells[key] = sentence_id
+        self.queue.append(sentence_id)
 
     def get_neighbors(self, cell):
         """
@@ -217,55 +343,158 @@ class MinesweeperAI():
         """
         # 1-2
         self.moves_made.add(cell)
+        self.safe_moves.discard(cell)
+        self.unknown.discard(cell)
         self.mark_safe(cell)
-        
-        # 3
-        neighbors = self.get_neighbors(cell)
-        to_remove = set()
-        for neighbor in neighbors:
-            if neighbor in self.moves_made or neighbor in self.safes:
-                to_remove.add(neighbor)
-        
-        neighbors.difference_update(to_remove)
-        self.knowledge.append(Sentence(neighbors, count))
-
-        # 4
-        for sent in self.knowledge:
-            safes = sent.known_safes()
-            for safe in safes:
-                self.mark_safe(safe)
 
-        for sent in self.knowledge:
-            mines = sent.known_mines()    
+        # 3, leaving out neighbors already known
+        cells = set()
+        for neighbor in self.get_neighbors(cell):
+            if neighbor in self.mines:
+                count -= 1
+            elif neighbor not in self.safes:
+                cells.add(neighbor)
+        self.add_sentence(cells, count)
+
+        # 4-5
+        self.infer()
+        self.search_frontier()
+
+    def infer(self):
+        """
+        Draws conclusions from queued sentences until there are none left.
+        Marking a cell queues only the sentences it appears in.
+        """
+        while self.queue:
+            sentence_id = self.queue.popleft()
+            sentence = self.sentences.get(sentence_id)
+            if sentence is None:
+                continue
+            self.touched.update(sentence.cells)
+
+            mines = sentence.known_mines()
+            safes = sentence.known_safes()
             for mine in mines:
                 self.mark_mine(mine)
+            for safe in safes:
+                self.mark_safe(safe)
+            if not mines and not safes:
+                self.combine(sentence_id)
+
+    def combine(self, sentence_id):
+        """
+        Adds the difference between a sentence and every sentence that
+        shares a cell with it and is a subset or superset of it.
+        """
+        sentence = self.sentences[sentence_id]
+        others = set()
+        for cell in sentence.cells:
+            others.update(self.cell_sentences[cell])
+        others.discard(sentence_id)
+        for other in [self.sentences[other_id] for other_id in others]:
+            if sentence.cells < other.cells:
+                self.add_sentence(other.cells - sentence.cells,
+                                  other.count - sentence.count)
+            elif other.cells < sentence.cells:
+                self.add_sentence(sentence.cells - other.cells,
+                                  sentence.count - other.count)
+
+    def component(self, cell):
+        """
+        Returns the cells of the frontier connected to `cell` through
+        shared sentences, in the order they were reached, and the ids of
+        their sentences.
+        """
+        cells = [cell]
+        reached = {cell}
+        ids = set()
+        for current in cells:
+            for sentence_id in self.cell_sentences[current]:
+                if sentence_id in ids:
+                    continue
+                ids.add(sentence_id)
+                for other in self.sentences[sentence_id].cells:
+                    if other not in reached:
+                        reached.add(other)
+                        cells.append(other)
+        return cells, ids
+
+    def search_frontier(self):
+        """
+        Solves every part of the frontier touched since the last search
+        by trying each arrangement of mines in it, and marks the cells
+        that are mines, or safe, in all arrangements its sentences allow.
+        Parts are independent, so each is searched on its own, and parts
+        of more than COMPONENT_LIMIT cells are left to the sentences.
+        """
+        while self.touched:
+            touched, self.touched = self.touched, set()
+            searched = set()
+            for cell in touched:
+                if cell in searched or cell not in self.cell_sentences:
+                    continue
+                cells, ids = self.component(cell)
+                searched.update(cells)
+                if len(cells) > COMPONENT_LIMIT:
+                    continue
+                mines, safes = self.solve_component(cells, ids)
+                for mine in mines:
+                    self.mark_mine(mine)
+                for safe in safes:
+                    self.mark_safe(safe)
+            self.infer()
+
+    def solve_component(self, cells, ids):
+        """
+        Returns the cells that are mines in every arrangement of mines
+        consistent with the sentences, and those that are safe in every
+        one.
+        """
+        sentences = [self.sentences[sentence_id] for sentence_id in ids]
+        constraints = {cell: [] for cell in cells}
+        for k, sentence in enumerate(sentences):
+            for cell in sentence.cells:
+                constraints[cell].append(k)
+
+        # Per sentence, mines still to place and cells still unassigned
+        needed = [sentence.count for sentence in sentences]
+        unassigned = [len(sentence.cells) for sentence in sentences]
+
+        assignment = []
+        mine_counts = [0] * len(cells)
+        arrangements = 0
+
+        def place(i):
+            nonlocal arrangements
+            if i == len(cells):
+                arrangements += 1
+                for j, mine in enumerate(assignment):
+                    mine_counts[j] += mine
+                return
+            for mine in (0, 1):
+                feasible = True
+                for k in constraints[cells[i]]:
+                    needed[k] -= mine
+                    unassigned[k] -= 1
+                    if not 0 <= needed[k] <= unassigned[k]:
+                        feasible = False
+                if feasible:
+                    assignment.append(mine)
+                    place(i + 1)
+                    assignment.pop()
+                for k in constraints[cells[i]]:
+                    needed[k] += mine
+                    unassigned[k] += 1
+
+        place(0)
+        if arrangements == 0:
+            return set(), set()
+        mines = {cell for cell, count in zip(cells, mine_counts)
+                 if count == arrangements}
+        safes = {cell for cell, count in zip(cells, mine_counts)
+                 if count == 0}
+        return mines, safes
 
-        # 5
-        for i, kn1 in enumerate(self.knowledge):
-            for j, kn2 in enumerate(self.knowledge):
-                if i >= j:
-                    continue      
-                if kn1.cells.issubset(kn2.cells):   
-                    if kn1.count == kn2.count:
-                        kn1.cells.union(kn2.cells)
-                        kn1.cells = set()
-                    elif kn1.count != 0 and kn2.count != 0:    
-                        kn2.cells = kn2.cells - kn1.cells
-                        subtract = kn2.count - kn1.count
-                        kn2.count = 0 if subtract < 0 else subtract
-                elif kn2.cells.issubset(kn1.cells):
-                    if kn2.count == kn1.count:
-                        kn2.cells.union(kn1.cells)
-                        kn2.cells = set()
-                    elif kn1.count != 0 and kn2.count != 0:
-                        kn1.cells = kn1.cells - kn2.cells
-                        subtract = kn1.count - kn2.count
-                        kn1.count = 0 if subtract < 0 else subtract
-        
-        for sen in self.knowledge:
-            if len(sen.cells) == 0:
-                self.knowledge.remove(sen)
-        
     def make_safe_move(self):
         """
         Returns a safe cell to choose on the Minesweeper board.
@@ -275,14 +504,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        if self.safes:            
-            next_moves = []
-            for cell in self.safes:    
-                if cell not in self.moves_made and cell not in self.mines:
-                    next_moves.append(cell)
-            if next_moves:
-                return random.choice(next_moves)     
-        return None
+        return self.safe_moves.choice()
 
     def make_random_move(self):
         """
@@ -291,9 +513,4 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        grid = [(col, row) for col in range(self.width) for row in range(self.height)] 
-        next_moves = []
-        for cell in grid:
-            if cell not in self.moves_made and cell not in self.mines:
-                next_moves.append(cell)
-        return random.choice(next_moves) if next_moves else None
\ No newline at end of file
+        return self.unknown.choice()